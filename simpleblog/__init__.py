@@ -8,15 +8,22 @@ See the LICENSE and README files for more information
 """
 
 import os
+import re
+import sys
 import pkgutil
 from codecs import decode, encode
-from collections import defaultdict
+from collections import ChainMap, defaultdict
 from datetime import datetime
 from functools import wraps
+from hashlib import sha1
+from importlib.util import find_spec
+from inspect import signature
 from operator import attrgetter
+from string import Formatter
+from types import MappingProxyType
 
 from plib.stdlib.decotools import (
-    cached_function, cached_method, cached_property, memoize_generator)
+    cached_function, cached_method, cached_property)
 from plib.stdlib.ini import PIniFile
 from plib.stdlib.ini.defs import *
 from plib.stdlib.iters import suffixed_items
@@ -24,18 +31,29 @@ from plib.stdlib.localize import (
     weekdayname, weekdayname_long,
     monthname, monthname_long)
 
+from simpleblog import trace
+from simpleblog.trace import span, traced, traced_hook
 
-__version__ = "0.9.7"
+
+__version__ = "0.9.8"
 
 
 blogfile_exts = ["json"]
 
-try:
-    from yaml import load as _loads
-except ImportError:
-    from json import loads
-else:
+# PyYAML is slow to import, so we only check here that it is available;
+# it is imported the first time a blog file is actually loaded
+
+if find_spec("yaml") is not None:
     blogfile_exts.insert(0, "yaml")
+
+
+@cached_function
+def blogfile_loader():
+    try:
+        from yaml import load as _loads
+    except ImportError:
+        from json import loads
+        return loads
     
     from functools import partial
     
@@ -51,7 +69,11 @@ else:
         lambda self, node: self.construct_scalar(node)
     )
     
-    loads = partial(_loads, Loader=_Loader)
+    return partial(_loads, Loader=_Loader)
+
+
+def loads(data):
+    return blogfile_loader()(data)
 
 
 inifile = PIniFile("simpleblog", [
@@ -82,6 +104,93 @@ def load_blogfile(filename, basename, mapping):
             break
 
 
+def file_stamp(filename, st=None):
+    """Return stamp identifying the current state of ``filename``.
+    
+    The stamp changes whenever the file's modification time or
+    size changes; a missing file gives an empty stamp. If the
+    file's stat result is already known it can be passed as ``st``.
+    """
+    if st is None:
+        try:
+            st = os.stat(filename)
+        except OSError:
+            return ""
+    return "{}:{}".format(st.st_mtime_ns, st.st_size)
+
+
+def value_stamp(value):
+    """Return stamp identifying ``value`` by its representation.
+    """
+    return sha1(encode(repr(value), 'utf-8')).hexdigest()
+
+
+template_formatter = Formatter()
+
+
+def template_fields(template):
+    """Return set of top-level field names used in ``template``.
+    """
+    try:
+        # Compiled templates already know their fields
+        return template.fields
+    except AttributeError:
+        return frozenset(
+            re.split(r'[.\[]', field, 1)[0]
+            for _, field, _, _ in template_formatter.parse(template)
+            if field
+        )
+
+
+class BlogTemplate(str):
+    """Template text compiled for repeated formatting.
+    
+    This is a ``str``, so it can be used anywhere template text is
+    expected, but the text is parsed once, when the template is loaded,
+    into literal text and replacement fields, and the ``fields`` attribute
+    gives the names of the fields ahead of time. If all the fields are
+    simple names (no attribute or index lookups, conversions, or nested
+    format specs), formatting just joins the parsed pieces with the field
+    values; otherwise it falls back to ``str.format``. Either way, the
+    output is the same as formatting the text with ``str.format``.
+    """
+    
+    def __new__(cls, text):
+        self = str.__new__(cls, text)
+        parts = list(template_formatter.parse(text))
+        self.fields = template_fields(str(text))
+        self.simple = all(
+            (conversion is None) and field.isidentifier() and ('{' not in spec)
+            for _, field, spec, conversion in parts
+            if field is not None
+        )
+        self.pieces = tuple(
+            (literal, field, spec or "")
+            for literal, field, spec, _ in parts
+        )
+        return self
+    
+    def format_map(self, mapping):
+        if not self.simple:
+            return str.format_map(self, mapping)
+        out = []
+        for literal, field, spec in self.pieces:
+            if literal:
+                out.append(literal)
+            if field is not None:
+                value = mapping[field]
+                out.append(
+                    value if (type(value) is str) and not spec
+                    else format(value, spec)
+                )
+        return "".join(out)
+    
+    def format(self, *args, **kwargs):
+        if args or not self.simple:
+            return str.format(self, *args, **kwargs)
+        return self.format_map(kwargs)
+
+
 # CONFIG
 
 newline = os.linesep
@@ -261,10 +370,55 @@ class BlogObject(BlogConfigUser):
         template_dir="templates"
     )
     
+    # Names of cached attributes holding render results that can be dropped
+    # once they have been written; classes and mixins declare their own, and
+    # the release_set property collects them over the whole class hierarchy
+    
+    release_names = ()
+    
+    # Names of further cached attributes that can be recomputed from the
+    # object's source, but more expensively, so they are only dropped when
+    # nothing more will use them or memory is short; evict_set collects
+    # these along with release_set
+    
+    evict_names = ()
+    
     def __init__(self, blog):
         self.blog = blog
         self.config = self.blog.config  # don't need to call the superclass __init__
     
+    @shared_property
+    def release_set(self):
+        return frozenset(
+            name
+            for klass in type(self).__mro__
+            for name in klass.__dict__.get('release_names', ())
+        )
+    
+    def release(self):
+        """Drop cached render results so their memory can be reclaimed.
+        
+        Cached properties and methods store their results in the instance
+        dictionary, so removing them there just means they will be computed
+        again if they are needed again.
+        """
+        for name in self.release_set:
+            self.__dict__.pop(name, None)
+    
+    @shared_property
+    def evict_set(self):
+        return self.release_set | frozenset(
+            name
+            for klass in type(self).__mro__
+            for name in klass.__dict__.get('evict_names', ())
+        )
+    
+    def evict(self):
+        """Drop all cached data that can be recomputed from the source.
+        """
+        for name in self.evict_set:
+            self.__dict__.pop(name, None)
+    
     @shared_method
     def template_basename(self, kind, format):
         return "{0}.{1}".format(kind, format)
@@ -276,15 +430,23 @@ class BlogObject(BlogConfigUser):
     @shared_method
     def template_data(self, kind, format):
         try:
-            return read_blogfile(self.template_file(kind, format))
+            return BlogTemplate(read_blogfile(self.template_file(kind, format)))
         except IOError:
             try:
-                return blogdata(pkgutil.get_data(
+                return BlogTemplate(blogdata(pkgutil.get_data(
                     'simpleblog',
                     "templates/{}".format(self.template_basename(kind, format))
-                ))
+                )))
             except IOError:
                 raise BlogConfigError("template {}.{} not found".format(kind, format))
+    
+    @shared_method
+    def template_stamp(self, kind, format):
+        filename = self.template_file(kind, format)
+        if os.path.isfile(filename):
+            return file_stamp(filename)
+        # Built-in templates only change with the package itself
+        return "simpleblog-{}".format(__version__)
 
 
 extension_types = {}
@@ -295,22 +457,80 @@ noresult = object()  # marker for no result returned
 
 noreturn = object()  # marker for no return value at all
 
+# Dispatch table giving the tuple of extension methods registered for each
+# (etype, key) pair, in extension load order; keys with no handlers are not
+# in the table at all, so looking them up gives the empty tuple
+
+extension_handlers = {}
+
+handler_key = re.compile(r'(?:get|mod)_|post_init$')
+
+# Hooks whose signatures have gained arguments, with the number of
+# arguments (including the instance) they used to take; hooks written
+# for the old signature are still called, with only those arguments
+
+legacy_hook_args = {
+    ('page', 'page_get_entry_params'): 2,
+    ('page', 'page_mod_entry_params'): 3
+}
+
+
+def legacy_hook(ext, nargs):
+    """Wrap ``ext`` to take only ``nargs`` arguments, if it can't take more.
+    """
+    try:
+        signature(ext).bind(*range(nargs + 1))
+    except TypeError:
+        return lambda *args: ext(*args[:nargs])
+    except ValueError:
+        pass
+    return ext
+
+
+def compile_extensions():
+    """Resolve ``extension_map`` into the ``extension_handlers`` table.
+    
+    This must be called whenever extensions are added to the map; the
+    extension loader does so after all extensions are loaded.
+    """
+    extension_handlers.clear()
+    for etype, extensions in extension_map.items():
+        prefix = '{}_'.format(etype)
+        for extension in extensions:
+            for key in dir(extension):
+                if key.startswith(prefix) and handler_key.match(key, len(prefix)):
+                    ext = getattr(extension, key)
+                    if callable(ext):
+                        nargs = legacy_hook_args.get((etype, key))
+                        if nargs is not None:
+                            ext = legacy_hook(ext, nargs)
+                        if trace.tracer is not None:
+                            # Blog hooks are few and coarse, so each call
+                            # gets its own span; others are only totalled
+                            ext = traced_hook(
+                                "{}.{}".format(type(extension).__name__, key),
+                                ext, etype == 'blog'
+                            )
+                        handlers = extension_handlers.get((etype, key), ())
+                        extension_handlers[(etype, key)] = handlers + (ext,)
+
 
 def check_extensions(instance, etype, key,
                      args=None, kwargs=None, result=noresult, modifying=False):
+    handlers = extension_handlers.get((etype, key), ())
+    if not handlers:
+        return result
     args = args or ()
     kwargs = kwargs or {}
-    for extension in extension_map.get(etype, ()):
-        ext = getattr(extension, key, None)
-        if ext is not None:
-            if result is noreturn:
-                ext(instance, *args, **kwargs)
-            elif modifying:
-                result = ext(instance, result, *args, **kwargs)
-            else:
-                result = ext(instance, *args, **kwargs)
-            if (not modifying) and (result not in (noresult, noreturn)):
-                break
+    for ext in handlers:
+        if result is noreturn:
+            ext(instance, *args, **kwargs)
+        elif modifying:
+            result = ext(instance, result, *args, **kwargs)
+        else:
+            result = ext(instance, *args, **kwargs)
+        if (not modifying) and (result not in (noresult, noreturn)):
+            break
     return result
 
 
@@ -345,9 +565,14 @@ class extendable_attr(object):
         assert name == self._func.__name__
         getkey = '{0}_get_{1}'.format(etype, name)
         modkey = '{0}_mod_{1}'.format(etype, name)
+        func = self._func
         
         @wraps(self._func)
         def meth(innerself, *args, **kwargs):
+            # Fast path for attributes that no extension handles
+            if ((etype, getkey) not in extension_handlers) and (
+                    (etype, modkey) not in extension_handlers):
+                return func(innerself, *args, **kwargs)
             # Check for extensions that might override the original function
             result = check_extensions(innerself, etype, getkey, args, kwargs)
             # Only call original function if no extension overrode it
@@ -456,14 +681,31 @@ class BlogEntry(BlogSource):
     config_vars = dict(
         utc_timestamps=False,
         timestamp_template="{hour:02d}:{minute:02d}",
-        datestamp_template="{year}-{month:02d}-{day:02d}"
+        datestamp_template="{year}-{month:02d}-{day:02d}",
+        render_cache_dir="",
+        render_cache_max_size=dict(
+            vartype=int,
+            default=100 * 1024 * 1024)
     )
     
     sourcetype = 'entry'
     
+    # These are only needed to build the formatted entry, which is kept,
+    # since any other page with the same format and params can reuse it
+    release_names = ('body', 'attrs')
+    
+    evict_names = (
+        'source', 'load', 'render', 'rendered', 'formatted', 'cached_size')
+    
+    # Approximate size of the data cached in the attributes above, which
+    # is used to keep the total within a memory budget when rendering
+    cached_size = 0
+    
     def __init__(self, blog, name):
         BlogObject.__init__(self, blog)
-        self.cachekey = name
+        # Entry names are repeated in every page and cache that refers
+        # to the entry, so intern them to share one copy
+        self.cachekey = sys.intern(name)
         self.metadata = {}
     
     @extendable_property()
@@ -495,7 +737,39 @@ class BlogEntry(BlogSource):
         return self._get_mtime()
     
     def _get_mtime(self):
-        return os.path.getmtime(self.filename)
+        st = self.blog.snapshot.stat(self.filename)
+        if st is None:
+            return os.path.getmtime(self.filename)
+        return st.st_mtime
+    
+    # Stamp is not extendable either; it identifies the current state of
+    # the entry's source for dependency tracking. Mixins that use a source
+    # other than the entry file should override _get_stamp.
+    
+    @cached_property
+    def stamp(self):
+        return self._get_stamp()
+    
+    def _get_stamp(self):
+        return file_stamp(self.filename, self.blog.snapshot.stat(self.filename))
+    
+    # Hash of the entry's source, for stamps that must not depend on
+    # file times (which change when a blog is checked out again)
+    
+    @cached_property
+    def content_stamp(self):
+        return sha1(encode(self.source, 'utf-8')).hexdigest()
+    
+    @cached_property
+    def cached_stamp(self):
+        """Return stamp of the values cached for this entry.
+        
+        Cached metadata such as the entry's timestamp can change without
+        the entry's source changing (for example, when a cache file is
+        edited by hand), so pages depend on it as well as on the source.
+        The ``cached`` decorator discards this when it adds a value.
+        """
+        return value_stamp(cached_values(self))
     
     @extendable_method()
     def datetime_from_mtime(self, mtime):
@@ -506,9 +780,9 @@ class BlogEntry(BlogSource):
     def timestamp(self):
         return self.datetime_from_mtime(self.mtime)
     
-    @extendable_property()
-    def timestamp_attrfuncs(self):
-        return dict(
+    @shared_property
+    def default_timestamp_attrfuncs(self):
+        return MappingProxyType(dict(
             year=None,
             month=None,
             day=None,
@@ -519,7 +793,16 @@ class BlogEntry(BlogSource):
             weekdayname_long=lambda t: weekdayname_long(t.weekday(), dt=True),
             monthname=lambda t: monthname(t.month),
             monthname_long=lambda t: monthname_long(t.month)
-        )
+        ))
+    
+    # The default mapping is shared by all entries and is read-only; if
+    # any extension modifies it, each entry gets its own copy to modify
+    
+    @extendable_property()
+    def timestamp_attrfuncs(self):
+        if extension_handlers.get(('entry', 'entry_mod_timestamp_attrfuncs')):
+            return dict(self.default_timestamp_attrfuncs)
+        return self.default_timestamp_attrfuncs
     
     @extendable_method()
     def timestamp_attrs(self, dt):
@@ -561,7 +844,7 @@ class BlogEntry(BlogSource):
     def load(self):
         """Load raw data.
         """
-        return self._do_load()
+        return self.account(self._do_load())
     
     def _do_load(self):
         return self.source
@@ -574,11 +857,62 @@ class BlogEntry(BlogSource):
     def render(self, rawdata):
         """Convert raw data into rendered data.
         """
-        return self._do_render(rawdata)
+        cache = self.render_cache
+        if cache is None:
+            return self.account(self._do_render(rawdata))
+        key = cache.make_key(rawdata, self.render_config)
+        result = cache.get(key)
+        if result is None:
+            result = self._do_render(rawdata)
+            cache.put(key, result)
+        return self.account(result)
     
     def _do_render(self, rawdata):
         return rawdata
     
+    def render_split(self, head, tail):
+        """Render ``head`` and ``head + tail``, and return both results.
+        
+        This is for entries that show a leading part of their data by
+        itself (e.g., the short version of a folded entry); mixins whose
+        renderers can produce both results from a single pass should
+        override _do_render_split. Unlike ``render``, this is not cached,
+        so callers should keep the results.
+        """
+        cache = self.render_cache
+        if cache is None:
+            results = self._do_render_split(head, tail)
+        else:
+            config = self.render_config
+            keys = [cache.make_key(rawdata, config) for rawdata in (head, head + tail)]
+            results = [cache.get(key) for key in keys]
+            if None in results:
+                results = self._do_render_split(head, tail)
+                for key, result in zip(keys, results):
+                    cache.put(key, result)
+        return tuple(self.account(result) for result in results)
+    
+    def _do_render_split(self, head, tail):
+        return self._do_render(head), self._do_render(head + tail)
+    
+    @shared_property
+    def render_cache(self):
+        if self.render_cache_dir:
+            from simpleblog.caching import BlogRenderCache
+            return BlogRenderCache(self.render_cache_dir, self.render_cache_max_size)
+        return None
+    
+    # Extensions that change how raw data is rendered must add whatever
+    # affects their output to this, since it is part of the render cache
+    # key; the raw data itself is the rest of the key
+    
+    @extendable_property()
+    def render_config(self):
+        return dict(
+            version=__version__,
+            extensions=list(self.config.get("extensions", ()))
+        )
+    
     @extendable_property()
     def rendered(self):
         return self.render(self.load())
@@ -612,7 +946,13 @@ class BlogEntry(BlogSource):
     
     @extendable_method()
     def formatted(self, format, params):
-        return self.template(format).format(**self.attrs(format, params))
+        return self.account(self.template(format).format_map(self.attrs(format, params)))
+    
+    def account(self, data):
+        """Add size of newly cached ``data`` to ``cached_size``.
+        """
+        self.cached_size += len(data)
+        return data
 
 
 # CONTAINERS
@@ -658,6 +998,11 @@ class BlogEntries(BlogSource, metaclass=BlogEntriesMeta):
     
     urlshort = ""
     
+    # Containers whose _get_entries already gives entries in the blog's
+    # master order (by filtering the blog's sorted_entries, or from its
+    # entries_by index) set this, so they don't have to sort them again
+    presorted = False
+    
     @cached_method
     def config_or_default(self, key):
         default_tmpl = getattr(self, 'default_{}'.format(key))
@@ -674,6 +1019,8 @@ class BlogEntries(BlogSource, metaclass=BlogEntriesMeta):
     
     @cached_property
     def entries(self):
+        if self.presorted:
+            return list(self._get_entries())
         return sorted(
             self._get_entries(),
             key=attrgetter(self.entry_sort_key),
@@ -705,18 +1052,38 @@ class BlogEntries(BlogSource, metaclass=BlogEntriesMeta):
             count=len(self.entries)
         )
     
+    # Containers that link to sibling sources give a hashable key for
+    # their group of siblings here; all containers in a group share one
+    # navigation index, so their sources are only found once per group
+    
+    @cached_property
+    def sourcetype_group(self):
+        return None
+    
+    @cached_property
+    def sourcetype_navigation(self):
+        key = self.sourcetype_group
+        if key is not None:
+            try:
+                return self.blog.source_navigation[key]
+            except KeyError:
+                pass
+        sources = self._get_sourcetype_sources()
+        navigation = (sources, dict((s, i) for i, s in enumerate(sources)))
+        if key is not None:
+            self.blog.source_navigation[key] = navigation
+        return navigation
+    
     @cached_property
     def sourcetype_sources(self):
-        return self._get_sourcetype_sources()
+        return self.sourcetype_navigation[0]
     
     def _get_sourcetype_sources(self):
         return []
     
     @cached_property
     def sourcetype_index(self):
-        if self.sourcetype_sources:
-            return self.sourcetype_sources.index(self)
-        return -1
+        return self.sourcetype_navigation[1].get(self, -1)
     
     def _get_next_source(self):
         i = self.sourcetype_index
@@ -738,8 +1105,10 @@ class BlogIndex(BlogEntries):
     default_title = "Home"
     default_heading = "Home Page"
     
+    presorted = True
+    
     def _get_entries(self):
-        return self.blog.all_entries
+        return self.blog.sorted_entries
 
 
 # PAGES
@@ -755,21 +1124,74 @@ def prefixed_keys(mapping, prefix):
     )
 
 
+class BlogContext(ChainMap):
+    """Template values layered over a shared base context.
+    
+    Only the values specific to this context are stored in the context
+    itself; lookups of any other key fall through to ``base``, which
+    can be shared among many contexts instead of being copied into
+    each one. Iterating, ``keys``, ``items``, and ``len`` cover both
+    layers, so the context can also be unpacked with ``**`` or copied
+    with ``dict``; changes only go into the context's own values.
+    """
+    
+    def __init__(self, base, *args, **kwargs):
+        ChainMap.__init__(self, dict(*args, **kwargs), base)
+    
+    @property
+    def base(self):
+        return self.maps[1]
+
+
 class BlogEntryParams(object):
-    """Convenience object to store format parameters.
+    """Immutable object to store format parameters.
+    
+    Params with the same values compare equal and hash the same, so
+    an entry's results cached by params (such as its ``formatted``
+    output) are reused by every page that formats the entry in the
+    same way. Parameter values must be hashable; the ``updated``
+    method returns new params with changed values.
     """
     
+    __slots__ = ('_params', '_hash')
+    
     def __init__(self, mapping=None, **kwargs):
-        self.update(mapping, **kwargs)
+        params = dict(mapping or (), **kwargs)
+        object.__setattr__(self, '_params', params)
+        object.__setattr__(self, '_hash', hash(frozenset(params.items())))
     
-    def update(self, mapping=None, **kwargs):
-        for obj in (mapping, kwargs):
-            if obj:
-                for k, v in obj.items():
-                    setattr(self, k, v)
+    def __getattr__(self, key):
+        if key.startswith('_'):
+            raise AttributeError(key)
+        try:
+            return self._params[key]
+        except KeyError:
+            raise AttributeError(key)
+    
+    def __setattr__(self, key, value):
+        raise AttributeError("entry params are immutable")
+    
+    def __eq__(self, other):
+        return isinstance(other, BlogEntryParams) and (self._params == other._params)
+    
+    def __hash__(self):
+        return self._hash
+    
+    def __repr__(self):
+        return "{}({!r})".format(type(self).__name__, self._params)
     
     def get(self, key, default=None):
-        return getattr(self, key, default)
+        return self._params.get(key, default)
+    
+    def update(self, mapping=None, **kwargs):
+        # Params used to be updated in place; make extensions that still
+        # do that fail with a message that says what to do instead
+        raise TypeError(
+            "entry params are immutable; use params.updated() and return the result"
+        )
+    
+    def updated(self, mapping=None, **kwargs):
+        return BlogEntryParams(dict(self._params, **dict(mapping or (), **kwargs)))
 
 
 @extendable
@@ -783,6 +1205,8 @@ class BlogPage(BlogObject):
         source_link_sep="&nbsp;&nbsp;"
     )
     
+    release_names = ('body', 'attrs', 'formatted', 'encoded', 'entry_params')
+    
     def __init__(self, blog, source, format):
         BlogObject.__init__(self, blog)
         self.source = source
@@ -804,17 +1228,21 @@ class BlogPage(BlogObject):
     # The format_entries generator is not extendable;
     # mixins can override _get_format_entries
     
+    # The entry's position in the page is passed in by the code that
+    # iterates over the entries, so extensions don't have to look for it;
+    # extensions that use it should only put what they derive from it
+    # into the params, so entries can still share them across pages
+    
     @extendable_method()
-    def entry_params(self, entry):
+    def entry_params(self, entry, index):
         return BlogEntryParams()
     
-    @memoize_generator
     def format_entries(self):
         return self._get_format_entries()
     
     def _get_format_entries(self):
-        for entry in self.entries:
-            yield entry.formatted(self.format, self.entry_params(entry))
+        for index, entry in enumerate(self.entries):
+            yield entry.formatted(self.format, self.entry_params(entry, index))
     
     @extendable_property()
     def body(self):
@@ -851,21 +1279,61 @@ class BlogPage(BlogObject):
             sourcelink_next=link_next_source,
             sourcelink_prev=link_prev_source
         )
-        return dict(
-            prefixed_keys(self.blog.metadata, 'blog_'),
-            sys_gen_name='simpleblog3',
-            sys_gen_uri="http://pypi.python.org/pypi/simpleblog3",
-            sys_gen_version=__version__,
-            **prefixed_keys(metadata, 'page_')
+        return BlogContext(
+            self.blog.page_context,
+            prefixed_keys(metadata, 'page_')
         )
     
-    @extendable_property()
+    @extendable_property(traced("page.formatted", attrgetter('filepath')))
     def formatted(self):
-        return self.template.format(**self.attrs)
+        return self.template.format_map(self.attrs)
+    
+    @extendable_property()
+    def dependencies(self):
+        """Return mapping of the inputs this page is rendered from.
+        
+        Keys name the inputs (entries, templates, config, blog metadata
+        keys, and derived values such as source links), and values are
+        stamps that change whenever the input does. Extensions that add
+        inputs to a page should add them here.
+        """
+        entries = self.entries or ()
+        deps = dict(
+            ("entry:{}".format(entry.cachekey), entry.stamp)
+            for entry in entries
+        )
+        deps.update(
+            ("cached:{}".format(entry.cachekey), entry.cached_stamp)
+            for entry in entries
+        )
+        deps.update(
+            ("template:{}".format(self.template_basename(kind, self.format)),
+             self.template_stamp(kind, self.format))
+            for kind in ("page", "entry")
+        )
+        deps.update(
+            ("metadata:{}".format(key[len('blog_'):]),
+             value_stamp(self.blog.metadata.get(key[len('blog_'):])))
+            for key in template_fields(self.template)
+            if key.startswith('blog_')
+        )
+        deps.update({
+            "config": self.blog.config_stamp,
+            "order:{}".format(self.filepath): value_stamp(
+                [entry.cachekey for entry in entries]),
+            "links:{}".format(self.filepath): value_stamp(self.source_links)
+        })
+        return deps
     
     @cached_property
+    @traced("page.encoded", attrgetter('filepath'))
     def encoded(self):
         return encode(self.formatted, self.blog.metadata['charset'])
+    
+    def release(self):
+        super(BlogPage, self).release()
+        for entry in self.entries or ():
+            entry.release()
 
 
 # BLOG
@@ -875,6 +1343,52 @@ class BlogMetadataError(BlogError):
     pass
 
 
+class BlogSnapshot(object):
+    """Snapshot of the entry files under a directory.
+    
+    The directory and its immediate (non-hidden) subdirectories are
+    each scanned once with ``os.scandir``, and the names and stat
+    results of all entry files are kept, so finding entries and
+    their mtimes does not have to go back to the filesystem.
+    """
+    
+    def __init__(self, path, suffix):
+        self.path = os.path.normpath(path)
+        self.suffix = suffix
+        self.names = {}
+        self.stats = {}
+        self.subdirs = self.scan(self.path)
+        for subdir in self.subdirs:
+            self.scan(os.path.join(self.path, subdir))
+    
+    def scan(self, path):
+        if not os.path.isdir(path):
+            # Leave it to whoever needs the entries to report this
+            return []
+        names = self.names[path] = []
+        subdirs = []
+        i = slice(None, -len(self.suffix) or None)
+        with os.scandir(path) as it:
+            for item in it:
+                if item.is_dir():
+                    if not item.name.startswith('.'):
+                        subdirs.append(item.name)
+                elif item.name.endswith(self.suffix):
+                    names.append(item.name[i])
+                    self.stats[os.path.join(path, item.name)] = item.stat()
+        return subdirs
+    
+    def entry_names(self, path):
+        """Return names of entries in ``path``, or None if not scanned.
+        """
+        return self.names.get(os.path.normpath(path))
+    
+    def stat(self, filename):
+        """Return stat result for ``filename``, or None if not scanned.
+        """
+        return self.stats.get(os.path.normpath(filename))
+
+
 @extendable
 class Blog(BlogObject):
     """The entire blog.
@@ -886,10 +1400,17 @@ class Blog(BlogObject):
             default=["html"]),
         entry_formats=dict(
             vartype=set,
-            default=["html"])
+            default=["html"]),
+        entry_sort_key='timestamp',
+        entry_sort_reversed=True,
+        render_memory_budget=None
     )
     
-    def __init__(self, config, filename=None):
+    # If warm_start is true, the blog's derived metadata is restored from
+    # the graph snapshot when nothing the blog is derived from has changed;
+    # only commands that save the snapshot (render-static) should use it
+    
+    def __init__(self, config, filename=None, warm_start=False):
         self.blog = self
         self.config = config
         self.metadata = {}
@@ -897,39 +1418,117 @@ class Blog(BlogObject):
         for key in self.required_metadata:
             if key not in self.metadata:
                 raise BlogMetadataError("{} missing from blog metadata".format(key))
-        for key, value in self.default_metadata.items():
-            self.metadata.setdefault(key, value.format(**self.metadata))
+        # The graph snapshot is keyed by the metadata as loaded, before
+        # anything is derived from it
+        self.blogfile_metadata = dict(self.metadata)
+        metadata = self.graph.metadata if warm_start else None
+        if metadata is not None:
+            # Nothing the blog is derived from has changed since the graph
+            # snapshot was saved, so its fully derived metadata can be used
+            self.metadata = metadata
+        else:
+            for key, value in self.default_metadata.items():
+                self.metadata.setdefault(key, value.format(**self.metadata))
     
     @extendable_property()
     def required_metadata(self):
         return set()
     
-    @extendable_property()
+    @extendable_property(traced("blog.default_metadata"))
     def default_metadata(self):
         return dict(
             charset='utf-8'
         )
     
+    @cached_property
+    def snapshot(self):
+        return BlogSnapshot(self.entries_dir, self.entry_ext)
+    
+    @cached_property
+    def graph(self):
+        from simpleblog.graph import BlogGraph
+        return BlogGraph(self)
+    
     @cached_method
     def filter_entries(self, path):
-        return suffixed_items(os.listdir(path), self.entry_ext)
+        names = self.snapshot.entry_names(path)
+        if names is None:
+            return suffixed_items(os.listdir(path), self.entry_ext)
+        return names
     
     @cached_property
     def entry_class(self):
         return extension_types['entry']
     
-    @extendable_property()
+    @extendable_property(traced("blog.all_entries"))
     def all_entries(self):
         return [
             self.entry_class(self, name)
             for name in self.filter_entries(self.entries_dir)
         ]
     
+    @cached_property
+    @traced("blog.sorted_entries")
+    def sorted_entries(self):
+        """Return all entries in the master order for entry containers.
+        
+        This is the same order as the ``entries`` of any container, so
+        containers can get their entries by filtering it instead of
+        sorting their own.
+        """
+        return sorted(
+            self.all_entries,
+            key=attrgetter(self.entry_sort_key),
+            reverse=self.entry_sort_reversed
+        )
+    
+    @cached_method
+    def entries_by(self, attrname, multi=False):
+        """Return index of entries by the value of ``attrname``.
+        
+        The index maps each value of the attribute to the list of entries
+        having that value, in master order; it is built in a single pass
+        over ``sorted_entries``. If ``multi`` is true, the attribute is a
+        collection of values (such as tags), and each entry is indexed
+        under all of them.
+        """
+        index = defaultdict(list)
+        for entry in self.sorted_entries:
+            value = getattr(entry, attrname)
+            for key in (value if multi else (value,)):
+                index[key].append(entry)
+        return index
+    
+    @cached_property
+    def entry_positions(self):
+        return dict((entry.cachekey, i) for i, entry in enumerate(self.sorted_entries))
+    
+    def entries_with_keys(self, keys):
+        """Return the entries with cache keys in ``keys``, in master order.
+        
+        Keys that are not the keys of current entries (such as keys that
+        a cache query gives for entries that have been removed) are
+        ignored.
+        """
+        positions = self.entry_positions
+        entries = self.sorted_entries
+        return [entries[i] for i in sorted(positions[key] for key in keys if key in positions)]
+    
+    @cached_property
+    def source_navigation(self):
+        """Return navigation indexes for entry containers.
+        
+        Each index is keyed by a container's ``sourcetype_group``, and is
+        a tuple of the group's sources in order and a mapping of each
+        source to its position.
+        """
+        return {}
+    
     @extendable_method()
     def index_entries(self, format):
         return BlogIndex(self)
     
-    @extendable_property()
+    @extendable_property(traced("blog.sources"))
     def sources(self):
         
         return [
@@ -945,16 +1544,52 @@ class Blog(BlogObject):
     def page_class(self):
         return extension_types['page']
     
-    @extendable_property()
+    @extendable_property(traced("blog.pages"))
     def pages(self):
         return [
             self.page_class(self, source, format)
             for source, format in self.sources
         ]
     
+    @property
+    def page_context(self):
+        """Return template values shared by all pages.
+        
+        This is built again each time a page is formatted, since
+        extensions can still change the blog metadata while entries
+        are loaded and rendered.
+        """
+        return dict(
+            prefixed_keys(self.metadata, 'blog_'),
+            sys_gen_name='simpleblog3',
+            sys_gen_uri="http://pypi.python.org/pypi/simpleblog3",
+            sys_gen_version=__version__
+        )
+    
+    @cached_property
+    def config_stamp(self):
+        return value_stamp((__version__, self.config.settings))
+    
+    # Commands that only render some pages (e.g., incremental rendering)
+    # can set render_pages before render_items is computed
+    
+    @extendable_property()
+    def render_pages(self):
+        return self.pages
+    
+    # Extensions that render items other than pages (e.g., stylesheets)
+    # should add them here; the streaming pipeline in the pipeline module
+    # only uses render_items if an extension hooks it
+    
+    @extendable_property(traced("blog.extra_render_items"))
+    def extra_render_items(self):
+        return []
+    
     @extendable_property()
     def render_items(self):
-        return [(page.encoded, page.filepath) for page in self.pages]
+        return [
+            (page.encoded, page.filepath) for page in self.render_pages
+        ] + self.extra_render_items
 
 
 # INITIALIZATION
@@ -967,8 +1602,23 @@ def initialize(config):
         load(config, extensions)
 
 
-def load_blog(opts):
-    config = BlogConfig(opts.configfile)
-    initialize(config)
-    blog = extension_types['blog'](config, opts.blogfile)
+def load_config(opts):
+    with span("config"):
+        config = BlogConfig(opts.configfile)
+    with span("extensions"):
+        initialize(config)
+    return config
+
+
+def load_blog(opts, config=None, warm_start=False):
+    if config is None:
+        config = load_config(opts)
+    with span("blog"):
+        blog = extension_types['blog'](config, opts.blogfile, warm_start)
     return config, blog
+
+
+# The caching module uses the classes above, so it can only be
+# imported once they are defined
+
+from simpleblog.caching import cached_values
@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+Module BENCH -- Simple Blog Benchmarks
+Package SIMPLEBLOG
+Copyright (C) 2012-2013 by Peter A. Donis
+
+Released under the GNU General Public License, Version 2
+See the LICENSE and README files for more information
+
+This module generates synthetic blogs and times ``render-static``
+runs on them; the ``bench`` command is the front end. Each run is
+done in a separate process, started by running this module with
+``python -m``, so its peak memory can be measured and so that no
+state is shared between runs; the process traces the run (see the
+``trace`` module) and reports the trace along with its time and
+peak memory.
+"""
+
+import os
+import sys
+import json
+import math
+import random
+import runpy
+import subprocess
+from collections import defaultdict
+from importlib.util import find_spec
+from time import perf_counter
+
+
+bench_extensions = [
+    "title",
+    "tags",
+    "timestamps",
+    "render_markdown",
+    "folding",
+    "categories",
+    "archives",
+    "feed",
+    "links",
+    "paginate",
+    "indexes",
+    "grouping",
+    "copyright",
+    "quote",
+    "localize"
+]
+
+bench_config = dict(
+    entry_ext=".txt",
+    extensions=bench_extensions,
+    index_formats=["html", "rss", "atom"],
+    archive_years=True,
+    archive_months=True,
+    archive_link_years=True,
+    archive_link_months=True,
+    archive_feeds="month",
+    page_max_entries=10,
+    link_index_alpha=True,
+    link_sourcetypes=dict(blog=None, tag="name", category=None),
+    markdown_pretty=True
+)
+
+bench_metadata = dict(
+    title="Benchmark Blog",
+    description="A synthetic blog for benchmarks",
+    author="Ima Writer",
+    email="ima@example.com",
+    root_url="http://www.example.com",
+    language="en",
+    country="US",
+    charset="utf-8",
+    feed_stylesheet_url="/feed.css",
+    highlight_stylesheet_url="/highlight.css"
+)
+
+bench_templates = {
+    "entry.html": (
+        '<div class="entry">\n'
+        '<h2><a href="{permalink}">{title}</a></h2>\n'
+        '{body}\n'
+        '<p>Posted in {categorylink} at {timestamp} on {datestamp}; tags: {taglinks}</p>\n'
+        '{entrylinks}\n'
+        '</div>'
+    ),
+    "short.html": '{body}\n<p><a href="{link}">Read more...</a></p>',
+    "entry.links": "<p>{prev_in_blog} {next_in_blog}</p>",
+    "group.head": "<h3>{datestamp_formatted}</h3>",
+    "group.foot": "",
+    "index.links": '<div class="links">\n{index_links}\n</div>',
+    "page.html": (
+        "<html>\n<head>\n<title>{blog_title} - {page_title}</title>\n"
+        "{blog_feed_links}\n</head>\n<body>\n"
+        "<h1>{page_heading}</h1>\n{page_entries}\n<p>{page_links}</p>\n"
+        "<div>{blog_tag_links}</div>\n<div>{blog_category_links}</div>\n"
+        "<div>{blog_archive_links}</div>\n<p>{blog_copyright_display}</p>\n"
+        "</body>\n</html>\n"
+    )
+}
+
+# Benchmark blogs start on this date (2010-01-01 UTC), with an entry
+# every 12 hours, so larger blogs also have more archives
+
+bench_start = 1262304000
+
+bench_interval = 43200
+
+filler = (
+    "Lorem ipsum dolor sit amet, consectetur adipiscing elit, sed do "
+    "eiusmod tempor incididunt ut labore et dolore magna aliqua. Ut enim "
+    "ad minim veniam, quis nostrud *exercitation* ullamco laboris nisi."
+)
+
+code_block = [
+    "    :::python",
+    "    def entry_{0}(x):",
+    "        return x * {0}",
+]
+
+
+def write_json(filename, data):
+    with open(filename, 'w') as f:
+        json.dump(data, f, indent=1, sort_keys=True)
+
+
+def generate_blog(root, entries, tags=3, categories=5, size=5,
+                  fold_every=4, code_every=5, seed=0):
+    """Generate a synthetic blog with ``entries`` entries in ``root``.
+    
+    Each entry has ``tags`` tags (from a pool that grows with the
+    number of entries), is in one of ``categories`` categories, and
+    has ``size`` paragraphs of text; every ``fold_every``-th entry has
+    a fold marker, and every ``code_every``-th entry has a code block
+    (zero turns either off). The same arguments always give the same
+    blog.
+    """
+    rnd = random.Random(seed)
+    entries_dir = os.path.join(root, "entries")
+    template_dir = os.path.join(root, "templates")
+    os.makedirs(template_dir, exist_ok=True)
+    config = dict(bench_config)
+    if find_spec("pygments") is not None:
+        config.update(markdown_highlight=True, markdown_highlight_style="default")
+    write_json(os.path.join(root, "config.json"), config)
+    write_json(os.path.join(root, "blog.json"), bench_metadata)
+    for name, text in bench_templates.items():
+        with open(os.path.join(template_dir, name), 'w') as f:
+            f.write(text)
+    category_names = ["category{}".format(i) for i in range(max(categories, 1))]
+    for name in category_names:
+        os.makedirs(os.path.join(entries_dir, name), exist_ok=True)
+    tag_names = ["tag{}".format(i) for i in range(max(entries // 20, tags, 1))]
+    for i in range(entries):
+        lines = [
+            "Entry number {}".format(i),
+            "#tags {}".format(",".join(sorted(rnd.sample(tag_names, tags)))) if tags else "",
+            ""
+        ]
+        for p in range(size):
+            if p == 1 and fold_every and (i % fold_every == 0):
+                lines.extend(["<!-- FOLD -->", ""])
+            lines.extend([filler, ""])
+        if code_every and (i % code_every == 0):
+            lines.extend(line.format(i) for line in code_block)
+            lines.append("")
+        filename = os.path.join(
+            entries_dir, category_names[i % len(category_names)], "entry{}.txt".format(i)
+        )
+        with open(filename, 'w') as f:
+            f.write("\n".join(lines))
+        stamp = bench_start + i * bench_interval
+        os.utime(filename, (stamp, stamp))
+    return os.path.join(entries_dir, category_names[0], "entry0.txt")
+
+
+def phase_times(trace):
+    """Return mapping of phase names to total seconds in ``trace``.
+    
+    Spans with the same name (such as each page's ``page.formatted``)
+    are added up, and each extension hook is a phase of its own.
+    """
+    times = defaultdict(float)
+    
+    def add(span):
+        times[span['name']] += span['duration']
+        for child in span['children']:
+            add(child)
+    
+    add(trace['spans'])
+    for name, totals in trace['hooks'].items():
+        times["hook:{}".format(name)] = totals['seconds']
+    return dict(times)
+
+
+def run_render(script, root, args=()):
+    """Run ``render-static`` on the blog in ``root`` in a new process.
+    
+    Returns a dict with the run's ``seconds``, peak memory in MB
+    (``maxrss``, None if it can't be measured), the number of files
+    ``rendered`` and the number of those ``written`` (files whose
+    content was unchanged are not written unless the run is forced),
+    and ``phases`` (see ``phase_times``).
+    """
+    output = subprocess.check_output(
+        [sys.executable] +
+        ["-W{}".format(option) for option in sys.warnoptions] +
+        ["-m", "simpleblog.bench", script, root] + list(args),
+        universal_newlines=True
+    )
+    return json.loads(output.splitlines()[-1])
+
+
+def growth_flags(results, limit, floor=0.02):
+    """Return phases whose time grows faster than the number of entries.
+    
+    ``results`` maps entry counts to phase times; for each pair of
+    successive counts, a phase is flagged if its time grows with an
+    exponent over ``limit`` (1 is linear growth). Times under ``floor``
+    seconds are too noisy to compare, so they are counted as ``floor``.
+    """
+    flags = []
+    counts = sorted(results)
+    for n1, n2 in zip(counts, counts[1:]):
+        phases1, phases2 = results[n1], results[n2]
+        for name in sorted(phases2):
+            t1, t2 = phases1.get(name, 0.0), phases2[name]
+            if t2 > floor:
+                exponent = math.log(t2 / max(t1, floor)) / math.log(n2 / n1)
+                if exponent > limit:
+                    flags.append((name, n1, n2, t1, t2, exponent))
+    return flags
+
+
+def span_names(span):
+    yield span['name']
+    for child in span['children']:
+        for name in span_names(child):
+            yield name
+
+
+def output_stamps(dirname):
+    """Return mapping of the files under ``dirname`` to their stamps.
+    """
+    stamps = {}
+    for dirpath, _, filenames in os.walk(dirname):
+        for name in filenames:
+            filename = os.path.join(dirpath, name)
+            st = os.stat(filename)
+            stamps[filename] = (st.st_mtime_ns, st.st_size)
+    return stamps
+
+
+def main(script, root, *args):
+    tracefile = os.path.join(root, "bench.trace")
+    sys.argv = [script, "--trace", tracefile, "render-static", "-q"] + list(args)
+    os.chdir(root)
+    static_dir = os.path.join(root, "static")
+    before = output_stamps(static_dir)
+    start = perf_counter()
+    runpy.run_path(script, run_name='__main__')
+    seconds = perf_counter() - start
+    after = output_stamps(static_dir)
+    try:
+        import resource
+    except ImportError:
+        maxrss = None
+    else:
+        # Linux gives the peak in kilobytes, macOS in bytes
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        maxrss = maxrss / (1 << 20 if sys.platform == 'darwin' else 1 << 10)
+    with open(tracefile, 'r') as f:
+        trace = json.load(f)
+    os.remove(tracefile)
+    print(json.dumps(dict(
+        seconds=seconds,
+        maxrss=maxrss,
+        rendered=sum(1 for name in span_names(trace['spans']) if name == "write"),
+        written=sum(1 for filename, stamp in after.items() if before.get(filename) != stamp),
+        phases=phase_times(trace)
+    )))
+
+
+if __name__ == '__main__':
+    main(*sys.argv[1:])
@@ -9,12 +9,65 @@ See the LICENSE and README files for more information
 """
 
 import os
+import re
+import glob
 import codecs
+from bisect import bisect_left
+from calendar import timegm
+from collections import defaultdict
 from functools import wraps
+from hashlib import sha256
 
 from plib.stdlib.decotools import cached_property
 
-from simpleblog import BlogObject
+from simpleblog import BlogObject, BlogConfigError, file_stamp
+
+
+# Caches are only compacted by the process that imported this module;
+# forked processes (such as parallel render workers) only append to
+# their own journals, since compacting would delete journals that
+# other processes are still appending to
+
+main_pid = os.getpid()
+
+# Stamps stored with validated values are the hash of the entry's source
+# and, after an @, its file stamp (see entry_stamp); a value that was
+# never validated has an empty stamp
+
+stamp_format = re.compile(r'(?:[0-9a-f]{40}@[0-9:]*)?$')
+
+
+def entry_stamp(entry):
+    """Return the stamp stored with values cached for ``entry``.
+    """
+    return "{}@{}".format(entry.content_stamp, entry.stamp)
+
+
+def timestamp_seconds(dt):
+    """Return the wall clock time of datetime ``dt`` as integer seconds.
+    
+    Any time zone is ignored, so times compare the same way as the
+    dates and times shown on the blog.
+    """
+    return timegm(dt.timetuple())
+
+
+def check_stamp(stamp, entry):
+    """Return the current stamp of ``entry`` if ``stamp`` is valid for it.
+    
+    Returns None if the entry's source has changed since ``stamp`` was
+    stored. The source is only read and hashed if the entry's file stamp
+    has changed, so values are checked without opening any entry files
+    unless the files have been touched (for example, in a fresh checkout).
+    """
+    if not stamp:
+        return None
+    digest, _, fstamp = stamp.partition('@')
+    if fstamp == entry.stamp:
+        return stamp
+    if digest == entry.content_stamp:
+        return entry_stamp(entry)
+    return None
 
 
 class BlogCache(BlogObject):
@@ -22,15 +75,50 @@ class BlogCache(BlogObject):
     
     This allows the blog structure and metadata to be assembled
     without having to stat or open and load any entry files.
+    
+    New items are appended to a journal file next to the cache file
+    as they are added, and the journal is only compacted into the
+    cache file when the cache is saved (at the end of each command,
+    or every ``cache_flush_interval`` new items if that is set). Each
+    process has its own journal, and only the main process compacts
+    them, so forked processes can add items to the same cache. If a
+    build is interrupted, the items in the journals are read back the
+    next time the cache is loaded.
+    
+    If ``validate`` is true, each value is stored with a stamp of the
+    entry's source it was computed from (see ``entry_stamp``), and a
+    value whose stamp is no longer valid is treated as not cached, so
+    it is recomputed when the entry changes. Stamps are based on the
+    content of the source, so they stay valid in a fresh checkout.
+    
+    Caches can be queried by member, if ``members`` is true (values are
+    collections, such as tag sets), or by time, if ``timestamp`` is given
+    (a function returning the datetime of a value). Queries only see
+    the values that are in the cache, so every entry's value must have
+    been looked up first, to add missing values and replace invalid ones;
+    keys of entries that no longer exist are not removed either. Here the
+    indexes are built in memory the first time they are queried.
     """
     
-    def __init__(self, blog, cachename, reverse=False, objtype=None, sep=' ', encoding='utf-8'):
+    config_vars = dict(
+        cache_flush_interval=dict(
+            vartype=int,
+            default=0)
+    )
+    
+    def __init__(self, blog, cachename, reverse=False, objtype=None, sep=' ',
+                 encoding='utf-8', validate=False, members=False, timestamp=None):
         BlogObject.__init__(self, blog)
         self.cachename = cachename
         self.reverse = reverse
         self.objtype = objtype
         self.sep = sep
         self.encoding = encoding
+        self.validate = validate
+        self.members = members
+        self.timestamp = timestamp
+        self.stamps = {}
+        self.pending = 0
     
     @cached_property
     def cache_dir(self):
@@ -40,64 +128,582 @@ class BlogCache(BlogObject):
     def filename(self):
         return os.path.join(self.cache_dir, self.cachename)
     
-    @cached_property
-    def cache(self):
+    @property
+    def journal_filename(self):
+        # Not cached, since forked processes must not share the journal
+        return "{}.journal.{}".format(self.filename, os.getpid())
+    
+    def journal_files(self):
+        """Return list of the existing journal files of this cache.
+        
+        This includes the journals of other processes, and a journal
+        from before journals were kept per process.
+        """
+        return sorted(glob.glob("{}.journal*".format(glob.escape(self.filename))))
+    
+    @property
+    def store_stamp(self):
+        """Return stamp of the files the cache is stored in.
+        """
+        return " ".join(
+            file_stamp(filename)
+            for filename in [self.filename] + self.journal_files()
+        )
+    
+    def read_lines(self, filename):
         try:
-            with codecs.open(self.filename, 'r', self.encoding) as f:
+            with codecs.open(filename, 'r', self.encoding) as f:
                 lines = f.readlines()
         except IOError:
-            return {}
+            return []
+        # A line without a newline at the end was cut off by an
+        # interrupted write, so it can't be trusted
+        if lines and not lines[-1].endswith('\n'):
+            del lines[-1]
+        return lines
+    
+    def split_line(self, line):
+        if self.reverse:
+            key, value = reversed(line.strip().rsplit(self.sep, 1))
         else:
+            key, value = line.strip().split(self.sep, 1)
+        return key, value
+    
+    def parse_line(self, line):
+        if self.validate:
+            # Lines are key, stamp, value (reversed if self.reverse)
             if self.reverse:
-                r = lambda line: tuple(reversed(line.strip().rsplit(self.sep, 1)))
+                fields = line.rstrip('\n').rsplit(self.sep, 2)[::-1]
             else:
-                r = lambda line: tuple(line.strip().split(self.sep, 1))
-            if self.objtype:
-                e = lambda t: (t[0], self.objtype(t[1]))
-                expr = (e(r(line)) for line in lines)
+                fields = line.rstrip('\n').split(self.sep, 2)
+            if (len(fields) == 3) and stamp_format.match(fields[1]):
+                key, stamp, value = fields
+                value = value.strip()
             else:
-                expr = (r(line) for line in lines)
-            return dict(expr)
+                # A line written before values were stamped; it gets no
+                # stamp, so its value is recomputed (and the line written
+                # in the new format) the next time it is used
+                key, value = self.split_line(line)
+                stamp = ""
+            self.stamps[key] = stamp
+        else:
+            key, value = self.split_line(line)
+        return key, (self.objtype(value) if self.objtype else value)
     
-    def save(self):
-        items = iter(self.cache.items())
+    def parse_lines(self, lines):
+        return (self.parse_line(line) for line in lines)
+    
+    def format_line(self, key, value):
+        fields = [key, self.stamps.get(key, ""), value] if self.validate else [key, value]
         if self.reverse:
-            items = ((v, k) for k, v in items)
-        lines = sorted("{0}{1}{2}\n".format(str(a), self.sep, str(b)) for a, b in items)
-        with codecs.open(self.filename, 'w', self.encoding) as f:
+            fields.reverse()
+        return "{}\n".format(self.sep.join(str(field) for field in fields))
+    
+    def get(self, key, entry=None):
+        """Return cached value for ``key``, or None if not cached.
+        
+        For a validated cache, ``entry`` is the entry the value is for,
+        and a value whose stamp is no longer valid for it is not returned.
+        """
+        cache = self.cache
+        if self.validate:
+            stamp = check_stamp(self.stamps.get(key), entry)
+            if stamp is None:
+                return None
+            # If only the file stamp changed, remember the new one so the
+            # source isn't hashed again, but don't rewrite the cache file
+            # just for that (so fresh checkouts don't modify it)
+            self.stamps[key] = stamp
+        return cache.get(key)
+    
+    def read_journals(self):
+        """Return list of journal files and the lines read from them.
+        """
+        filenames = self.journal_files()
+        lines = []
+        for filename in filenames:
+            lines.extend(self.read_lines(filename))
+        return filenames, lines
+    
+    @cached_property
+    def cache(self):
+        cache = dict(self.parse_lines(self.read_lines(self.filename)))
+        # Journals left over from an interrupted build are compacted
+        # the next time the cache is saved
+        cache.update(self.parse_lines(self.read_journals()[1]))
+        return cache
+    
+    def clear_indexes(self):
+        self.__dict__.pop('member_index', None)
+        self.__dict__.pop('timestamp_index', None)
+    
+    @cached_property
+    def member_index(self):
+        index = defaultdict(list)
+        for key, value in self.cache.items():
+            for member in value:
+                index[member].append(key)
+        return index
+    
+    @cached_property
+    def timestamp_index(self):
+        return sorted(
+            (timestamp_seconds(self.timestamp(value)), key)
+            for key, value in self.cache.items()
+        )
+    
+    def keys_with(self, member):
+        """Return the keys whose values contain ``member``, in key order.
+        """
+        return sorted(self.member_index.get(member, ()))
+    
+    def all_members(self):
+        """Return the members of all values, in order.
+        """
+        return sorted(self.member_index)
+    
+    def keys_between(self, start, end):
+        """Return the keys with times from ``start`` up to (not including) ``end``.
+        
+        The keys are in order of time (and key, for equal times); for
+        example, the keys of entries from 2019 are given by
+        ``keys_between(datetime(2019, 1, 1), datetime(2020, 1, 1))``.
+        """
+        index = self.timestamp_index
+        return [key for _, key in index[
+            bisect_left(index, (timestamp_seconds(start),)):
+            bisect_left(index, (timestamp_seconds(end),))
+        ]]
+    
+    def add(self, key, value, stamp=None):
+        """Add item to cache and append it to the journal.
+        """
+        self.cache[key] = value
+        self.clear_indexes()
+        if self.validate:
+            self.stamps[key] = stamp
+        with codecs.open(self.journal_filename, 'a', self.encoding) as f:
+            f.write(self.format_line(key, value))
+        self.pending += 1
+        if self.cache_flush_interval and (self.pending >= self.cache_flush_interval):
+            if os.getpid() == main_pid:
+                self.save()
+    
+    @property
+    def needs_save(self):
+        return bool(self.pending or self.journal_files())
+    
+    def flush(self):
+        """Make sure items added by this process are stored.
+        
+        Items are written to the journal as they are added, so there
+        is nothing to do here; this is for stores that batch writes.
+        """
+        pass
+    
+    def save(self):
+        # Pick up items other processes (such as parallel render workers)
+        # have journaled since the cache was loaded, so they aren't lost
+        filenames, journal = self.read_journals()
+        if journal:
+            self.cache.update(self.parse_lines(journal))
+            self.clear_indexes()
+        lines = sorted(self.format_line(k, v) for k, v in self.cache.items())
+        # Write to a temporary file and rename it, so readers never see
+        # a partially written file; the journals are only removed after
+        tmpname = "{}.{}.tmp".format(self.filename, os.getpid())
+        with codecs.open(tmpname, 'w', self.encoding) as f:
             f.writelines(lines)
+        os.replace(tmpname, self.filename)
+        for filename in filenames:
+            try:
+                os.remove(filename)
+            except OSError:
+                pass
+        self.pending = 0
+
 
+# Times are stored as integer seconds (see timestamp_seconds) in their
+# own column, and the members of collection values each have a row in
+# the members table, so both can be queried through their indexes
+
+sqlite_schema = """
+CREATE TABLE IF NOT EXISTS metadata (
+    cachename TEXT NOT NULL,
+    cachekey TEXT NOT NULL,
+    stamp TEXT,
+    value TEXT NOT NULL,
+    timestamp INTEGER,
+    PRIMARY KEY (cachename, cachekey)
+);
+CREATE INDEX IF NOT EXISTS metadata_timestamp ON metadata (cachename, timestamp);
+CREATE TABLE IF NOT EXISTS members (
+    cachename TEXT NOT NULL,
+    cachekey TEXT NOT NULL,
+    member TEXT NOT NULL,
+    PRIMARY KEY (cachename, cachekey, member)
+);
+CREATE INDEX IF NOT EXISTS members_member ON members (cachename, member);
+"""
+
+sqlite_connections = {}
+
+
+def sqlite_connection(filename):
+    """Return connection to SQLite cache database ``filename``.
+    
+    Connections are not shared with forked processes (such as parallel
+    render workers), since SQLite does not allow that; each process
+    opens its own.
+    """
+    key = (filename, os.getpid())
+    try:
+        return sqlite_connections[key]
+    except KeyError:
+        import sqlite3
+        conn = sqlite_connections[key] = sqlite3.connect(filename)
+        conn.executescript(sqlite_schema)
+        return conn
+
+
+class BlogSQLiteCache(BlogCache):
+    """Cache for data associated with blog entries, stored in SQLite.
+    
+    All caches share one database file, with one row per cached value,
+    so values are looked up individually instead of loading the whole
+    cache, and queries by member or time use the database's indexes.
+    New rows are committed every ``cache_commit_interval`` items, so an
+    interrupted build only loses the last few.
+    """
+    
+    config_vars = dict(
+        cache_db_file="cache.db",
+        cache_commit_interval=dict(
+            vartype=int,
+            default=100)
+    )
+    
+    def __init__(self, blog, cachename, reverse=False, objtype=None, sep=' ',
+                 encoding='utf-8', validate=False, members=False, timestamp=None):
+        BlogCache.__init__(
+            self, blog, cachename, reverse, objtype, sep, encoding, validate, members, timestamp
+        )
+        self.uncommitted = 0
+    
+    @cached_property
+    def db_filename(self):
+        return os.path.join(self.cache_dir, self.cache_db_file)
+    
+    @property
+    def db(self):
+        return sqlite_connection(self.db_filename)
+    
+    @property
+    def store_stamp(self):
+        return file_stamp(self.db_filename)
+    
+    @property
+    def needs_save(self):
+        return bool(self.pending)
+    
+    def get(self, key, entry=None):
+        row = self.db.execute(
+            "SELECT stamp, value FROM metadata WHERE cachename = ? AND cachekey = ?",
+            (self.cachename, key)
+        ).fetchone()
+        if row is None:
+            return None
+        row_stamp, value = row
+        if self.validate:
+            stamp = check_stamp(row_stamp, entry)
+            if stamp is None:
+                return None
+            if stamp != row_stamp:
+                self.db.execute(
+                    "UPDATE metadata SET stamp = ? WHERE cachename = ? AND cachekey = ?",
+                    (stamp, self.cachename, key)
+                )
+                self.pending += 1
+                self.uncommitted += 1
+        return self.objtype(value) if self.objtype else value
+    
+    def add(self, key, value, stamp=None):
+        db = self.db
+        db.execute(
+            "INSERT OR REPLACE INTO metadata (cachename, cachekey, stamp, value, timestamp) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (self.cachename, key, stamp if self.validate else None, str(value),
+             timestamp_seconds(self.timestamp(value)) if self.timestamp else None)
+        )
+        if self.members:
+            db.execute(
+                "DELETE FROM members WHERE cachename = ? AND cachekey = ?",
+                (self.cachename, key)
+            )
+            db.executemany(
+                "INSERT OR IGNORE INTO members (cachename, cachekey, member) VALUES (?, ?, ?)",
+                ((self.cachename, key, str(member)) for member in value)
+            )
+        self.pending += 1
+        self.uncommitted += 1
+        if self.uncommitted >= self.cache_commit_interval:
+            self.flush()
+    
+    def flush(self):
+        self.db.commit()
+        self.uncommitted = 0
+    
+    def save(self):
+        self.flush()
+        self.pending = 0
+    
+    def keys_with(self, member):
+        return [key for key, in self.db.execute(
+            "SELECT cachekey FROM members WHERE cachename = ? AND member = ? "
+            "ORDER BY cachekey",
+            (self.cachename, member)
+        )]
+    
+    def all_members(self):
+        return [member for member, in self.db.execute(
+            "SELECT DISTINCT member FROM members WHERE cachename = ? ORDER BY member",
+            (self.cachename,)
+        )]
+    
+    def keys_between(self, start, end):
+        return [key for key, in self.db.execute(
+            "SELECT cachekey FROM metadata WHERE cachename = ? "
+            "AND timestamp >= ? AND timestamp < ? ORDER BY timestamp, cachekey",
+            (self.cachename, timestamp_seconds(start), timestamp_seconds(end))
+        )]
+
+
+cache_stores = dict(
+    text=BlogCache,
+    sqlite=BlogSQLiteCache
+)
+
+cache_specs = {}
 
 cache_map = {}
 
 
-def cached(cachename, reverse=False, objtype=None, sep=' '):
+def cache_class(blog):
+    """Return the cache class for the ``cache_store`` config setting.
+    
+    The setting determines whether caches are stored in text files
+    (the default) or in a SQLite database.
+    """
+    store = blog.config.get('cache_store', "text")
+    try:
+        return cache_stores[store]
+    except KeyError:
+        raise BlogConfigError("unknown cache store {}".format(store))
+
+
+def get_cache(blog, cachename):
+    """Return the cache object for ``cachename``.
+    """
+    try:
+        return cache_map[cachename]
+    except KeyError:
+        reverse, objtype, sep, validate, members, timestamp = cache_specs[cachename]
+        klass = cache_class(blog)
+        cacheobj = cache_map[cachename] = klass(
+            blog, cachename, reverse, objtype, sep, blog.metadata['charset'],
+            validate, members, timestamp
+        )
+        return cacheobj
+
+
+def cached(cachename, reverse=False, objtype=None, sep=' ', validate=False,
+           members=False, timestamp=None):
     """Decorator for blog entry properties that should be cached.
+    
+    The ``reverse`` and ``sep`` arguments determine the layout of the
+    cache's text file; ``objtype`` is the type cached values are
+    converted to, and ``validate`` tells whether values should be
+    recomputed when the entry's source changes. Note that values that
+    should never change once cached, such as entry timestamps, must not
+    be validated. The ``members`` and ``timestamp`` arguments make the
+    cache queryable by member or by time (see ``BlogCache``).
     """
     
+    cache_specs[cachename] = (reverse, objtype, sep, validate, members, timestamp)
+    
     def decorator(f):
         @wraps(f)
         def fcache(self, *args, **kwargs):
-            try:
-                cacheobj = cache_map[cachename]
-            except KeyError:
-                cacheobj = cache_map[cachename] = BlogCache(
-                    self.blog,
-                    cachename,
-                    reverse,
-                    objtype,
-                    sep,
-                    self.blog.metadata['charset']
-                )
-            cache = cacheobj.cache
-            try:
-                return cache[self.cachekey]
-            except KeyError:
+            cacheobj = get_cache(self.blog, cachename)
+            value = cacheobj.get(self.cachekey, self)
+            if value is None:
                 value = f(self, *args, **kwargs)
                 if cacheobj.objtype is not None:
                     value = cacheobj.objtype(value)
-                cache[self.cachekey] = value
-                cacheobj.save()
-                return value
+                cacheobj.add(
+                    self.cachekey, value,
+                    entry_stamp(self) if cacheobj.validate else None
+                )
+                # The entry's cached values changed, so its stamp of them
+                # has to be computed again
+                self.__dict__.pop('cached_stamp', None)
+            return value
         return fcache
     return decorator
+
+
+def cache_store_stamps(blog):
+    """Return sorted list of the names and store stamps of all caches.
+    
+    This doesn't load the caches, or need the blog's derived metadata
+    (such as its charset), so it can be used while the blog is set up.
+    """
+    klass = cache_class(blog)
+    return sorted(
+        (cachename, klass(blog, cachename).store_stamp)
+        for cachename in cache_specs
+    )
+
+
+def cached_values(entry):
+    """Return list of the values cached for ``entry``, by cache name.
+    
+    Values are given as the strings they are stored as, so they can be
+    stamped by their representation; values that are not cached (or
+    are no longer valid) are None.
+    """
+    results = []
+    for cachename in sorted(cache_specs):
+        cacheobj = get_cache(entry.blog, cachename)
+        value = cacheobj.get(entry.cachekey, entry)
+        results.append((cachename, None if value is None else str(value)))
+    return results
+
+
+def import_caches(blog):
+    """Copy the contents of all text file caches into the SQLite store.
+    
+    Returns a list of the cache names and the number of items copied.
+    """
+    results = []
+    for cachename, spec in sorted(cache_specs.items()):
+        reverse, objtype, sep, validate, members, timestamp = spec
+        encoding = blog.metadata['charset']
+        source = BlogCache(
+            blog, cachename, reverse, objtype, sep, encoding, validate, members, timestamp
+        )
+        target = BlogSQLiteCache(
+            blog, cachename, reverse, objtype, sep, encoding, validate, members, timestamp
+        )
+        for key, value in source.cache.items():
+            target.add(key, value, source.stamps.get(key))
+        target.save()
+        results.append((cachename, len(source.cache)))
+    return results
+
+
+def flush_caches():
+    """Store the items this process has added to caches, without compacting.
+    
+    Worker processes call this, since they exit without saving caches;
+    the main process compacts everything they stored when it saves.
+    """
+    for cacheobj in cache_map.values():
+        cacheobj.flush()
+
+
+def save_caches():
+    """Compact the journals of all caches with new items.
+    
+    This includes items journaled by other processes, such as parallel
+    render workers, even if this process added none.
+    """
+    for cacheobj in cache_map.values():
+        if cacheobj.needs_save:
+            cacheobj.save()
+
+
+class BlogRenderCache(object):
+    """Content-addressed on-disk cache for rendered entry data.
+    
+    Each rendered result is stored in its own file, named by a hash of
+    the raw data and the render configuration that produced it, so the
+    cache directory does not depend on where the blog lives and can be
+    shared among checkouts and machines. Files are written atomically,
+    and each cache hit updates the file's mtime; when the total size of
+    the cache exceeds ``max_size``, the least recently used files are
+    removed.
+    """
+    
+    prune_ratio = 0.9  # prune down to this fraction of max_size
+    
+    def __init__(self, cache_dir, max_size, encoding='utf-8'):
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        self.encoding = encoding
+    
+    def make_key(self, rawdata, config):
+        h = sha256(codecs.encode(repr(sorted(config.items())), self.encoding))
+        h.update(codecs.encode(rawdata, self.encoding))
+        return h.hexdigest()
+    
+    def filename(self, key):
+        return os.path.join(self.cache_dir, key[:2], key)
+    
+    def files(self):
+        for dirpath, _, filenames in os.walk(self.cache_dir):
+            for name in filenames:
+                if not name.endswith('.tmp'):
+                    yield os.path.join(dirpath, name)
+    
+    @cached_property
+    def total_size(self):
+        return sum(os.path.getsize(filename) for filename in self.files())
+    
+    def get(self, key):
+        filename = self.filename(key)
+        try:
+            with codecs.open(filename, 'r', self.encoding) as f:
+                data = f.read()
+        except IOError:
+            return None
+        try:
+            os.utime(filename)
+        except OSError:
+            pass
+        return data
+    
+    def put(self, key, data):
+        filename = self.filename(key)
+        dirname = os.path.dirname(filename)
+        if not os.path.isdir(dirname):
+            os.makedirs(dirname, exist_ok=True)
+        tmpname = "{}.{}.tmp".format(filename, os.getpid())
+        with codecs.open(tmpname, 'w', self.encoding) as f:
+            f.write(data)
+        os.replace(tmpname, filename)
+        self.total_size += os.path.getsize(filename)
+        if self.total_size > self.max_size:
+            self.prune()
+    
+    def prune(self):
+        stats = []
+        for filename in self.files():
+            try:
+                st = os.stat(filename)
+            except OSError:
+                continue
+            stats.append((st.st_mtime, st.st_size, filename))
+        stats.sort()
+        total = sum(size for _, size, _ in stats)
+        target = self.max_size * self.prune_ratio
+        for _, size, filename in stats:
+            if total <= target:
+                break
+            try:
+                os.remove(filename)
+            except OSError:
+                pass
+            else:
+                total -= size
+        self.total_size = total
@@ -17,6 +17,10 @@ class BlogCommand(BlogConfigUser):
     options = None
     arguments = None
     
+    # Whether the blog can be set up from the graph snapshot saved by
+    # the last render (see the graph module)
+    warm_start = False
+    
     def __init__(self, config, opts, args):
         BlogConfigUser.__init__(self, config)
         self.opts = opts
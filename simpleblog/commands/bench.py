@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Module BENCH -- Simple Blog Benchmark Command
+Sub-Package SIMPLEBLOG.COMMANDS
+Copyright (C) 2012-2013 by Peter A. Donis
+
+Released under the GNU General Public License, Version 2
+See the LICENSE and README files for more information
+"""
+
+import os
+import sys
+import json
+import shutil
+import tempfile
+
+from simpleblog.bench import generate_blog, run_render, growth_flags
+from simpleblog.commands import BlogCommand
+
+
+class Bench(BlogCommand):
+    """Benchmark static rendering of synthetic blogs.
+    
+    For each entry count given, a synthetic blog is generated and
+    rendered four times: cold (with no caches or previous output),
+    unchanged (which the graph snapshot short-circuits), warm (with
+    every page rendered again from warm caches), and incremental
+    (after one entry is changed). If more than one entry count is given, any phase of the
+    cold runs whose time grows faster than the number of entries (by
+    more than the scaling limit) is flagged, and the command exits with
+    an error status. The blog the command is run in is not used.
+    """
+    
+    options = (
+        ("-n", "--entries", {
+            'action': 'store', 'type': str,
+            'default': "1000",
+            'help': "comma-separated entry counts to benchmark"
+        }),
+        ("-g", "--tags", {
+            'action': 'store', 'type': int,
+            'default': 3,
+            'help': "number of tags per entry"
+        }),
+        ("-k", "--categories", {
+            'action': 'store', 'type': int,
+            'default': 5,
+            'help': "number of categories"
+        }),
+        ("-s", "--size", {
+            'action': 'store', 'type': int,
+            'default': 5,
+            'help': "number of paragraphs per entry"
+        }),
+        ("-f", "--fold-every", {
+            'action': 'store', 'type': int,
+            'default': 4,
+            'help': "put a fold marker in every Nth entry (0 for none)"
+        }),
+        ("-x", "--code-every", {
+            'action': 'store', 'type': int,
+            'default': 5,
+            'help': "put a code block in every Nth entry (0 for none)"
+        }),
+        ("-l", "--scaling-limit", {
+            'action': 'store', 'type': float,
+            'default': 1.25,
+            'help': "flag phases whose time grows faster than entries to this power"
+        }),
+        ("-d", "--dir", {
+            'action': 'store', 'type': str,
+            'default': "",
+            'help': "directory to generate blogs in (default is a temporary one)"
+        }),
+        ("-o", "--output", {
+            'action': 'store', 'type': str,
+            'default': "",
+            'help': "file to write the results to as JSON"
+        }),
+        ("-q", "--quiet", {
+            'action': 'store_true',
+            'help': "suppress console output"
+        })
+    )
+    
+    def report(self, label, n, result):
+        if not self.opts.quiet:
+            print("  {:<12} {:8.2f} s {:10.0f} entries/s {:6d} rendered {:6d} written {:>8} MB".format(
+                label, result['seconds'], n / result['seconds'],
+                result['rendered'], result['written'],
+                "?" if result['maxrss'] is None else "{:.0f}".format(result['maxrss'])
+            ))
+    
+    def bench(self, script, root, n):
+        opts = self.opts
+        if not opts.quiet:
+            print("Generating blog with {} entries".format(n))
+        changed = generate_blog(
+            root, n, opts.tags, opts.categories, opts.size,
+            opts.fold_every, opts.code_every
+        )
+        results = {}
+        # The warm run is forced, so it renders every page instead of
+        # stopping at the graph snapshot like the unchanged run does
+        for label, args in (
+            ("cold", ["-i"]),
+            ("unchanged", ["-i"]),
+            ("warm", ["-f"]),
+            ("incremental", ["-i"])
+        ):
+            if label == "incremental":
+                with open(changed, 'a') as f:
+                    f.write("\nOne more paragraph.\n")
+            result = results[label] = run_render(script, root, args)
+            self.report(label, n, result)
+        return results
+    
+    def run(self, blog):
+        script = os.path.abspath(sys.argv[0])
+        counts = sorted(int(n) for n in self.opts.entries.split(","))
+        base = self.opts.dir or tempfile.mkdtemp(prefix="simpleblog-bench-")
+        try:
+            results = dict(
+                (n, self.bench(script, os.path.join(base, str(n)), n))
+                for n in counts
+            )
+        finally:
+            if not self.opts.dir:
+                shutil.rmtree(base, ignore_errors=True)
+        flags = growth_flags(
+            dict((n, results[n]['cold']['phases']) for n in counts),
+            self.opts.scaling_limit
+        )
+        if self.opts.output:
+            with open(self.opts.output, 'w') as f:
+                json.dump(dict(
+                    results=results,
+                    flags=[
+                        dict(phase=name, entries=[n1, n2], seconds=[t1, t2], exponent=exponent)
+                        for name, n1, n2, t1, t2, exponent in flags
+                    ]
+                ), f, indent=1, sort_keys=True)
+        for name, n1, n2, t1, t2, exponent in flags:
+            if not self.opts.quiet:
+                print("Super-linear growth in {}: {:.2f} s at {} entries, {:.2f} s at {} "
+                      "entries (exponent {:.2f})".format(name, t1, n1, t2, n2, exponent))
+        if flags:
+            sys.exit(1)
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Module CHECK_MARKDOWN -- Simple Blog Markdown Backend Check
+Sub-Package SIMPLEBLOG.COMMANDS
+Copyright (C) 2012-2013 by Peter A. Donis
+
+Released under the GNU General Public License, Version 2
+See the LICENSE and README files for more information
+"""
+
+import sys
+import random
+from difflib import unified_diff
+
+from simpleblog import BlogConfigError
+from simpleblog.commands import BlogCommand
+from simpleblog.extensions.render_markdown import reference_backend, select_backend
+
+
+class CheckMarkdown(BlogCommand):
+    """Check a Markdown backend against the reference backend.
+    
+    A sample of entries is rendered with both Python-Markdown (the
+    reference) and the backend being checked, with the blog's Markdown
+    settings, and the entries whose output differs are shown with a
+    diff. The command exits with an error status if any entry differs,
+    so a blog can be checked before its ``markdown_backend`` setting is
+    changed.
+    """
+    
+    options = (
+        ("-k", "--backend", {
+            'action': 'store', 'type': str,
+            'default': "",
+            'help': "backend to check (default is the markdown_backend setting)"
+        }),
+        ("-n", "--sample", {
+            'action': 'store', 'type': int,
+            'default': 100,
+            'help': "number of entries to check (0 for all)"
+        }),
+        ("-s", "--seed", {
+            'action': 'store', 'type': int,
+            'default': 0,
+            'help': "random seed for choosing the sample"
+        }),
+        ("-l", "--diff-lines", {
+            'action': 'store', 'type': int,
+            'default': 20,
+            'help': "maximum number of diff lines to show per entry"
+        }),
+        ("-q", "--quiet", {
+            'action': 'store_true',
+            'help': "only show the summary"
+        })
+    )
+    
+    def sample(self, entries):
+        n = self.opts.sample
+        if n and (n < len(entries)):
+            # Keep the sample in blog order so reports are easy to follow
+            indexes = sorted(random.Random(self.opts.seed).sample(range(len(entries)), n))
+            return [entries[i] for i in indexes]
+        return list(entries)
+    
+    def report(self, entry, expected, actual):
+        print("Entry {} differs:".format(entry.name))
+        lines = unified_diff(
+            expected.splitlines(), actual.splitlines(),
+            reference_backend, self.backend, lineterm=""
+        )
+        for i, line in enumerate(lines):
+            if i >= self.opts.diff_lines:
+                print("  ...")
+                break
+            print("  {}".format(line))
+    
+    def run(self, blog):
+        entries = blog.all_entries
+        if entries and not hasattr(entries[0], 'render_with'):
+            raise BlogConfigError("the render-markdown extension is not loaded")
+        self.backend = select_backend(
+            self.opts.backend or self.config.get('markdown_backend', reference_backend)
+        )
+        if self.backend == reference_backend:
+            print("Backend {} is the reference backend; nothing to check".format(self.backend))
+            return
+        sample = self.sample(entries)
+        differ = 0
+        for entry in sample:
+            raw = entry.load()
+            expected = entry.render_with(reference_backend, raw)
+            actual = entry.render_with(self.backend, raw)
+            if actual != expected:
+                differ += 1
+                if not self.opts.quiet:
+                    self.report(entry, expected, actual)
+        print("{} of {} entries checked differ between {} and {}".format(
+            differ, len(sample), reference_backend, self.backend
+        ))
+        if differ:
+            sys.exit(1)
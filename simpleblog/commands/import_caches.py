@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+"""
+Module IMPORT_CACHES -- Simple Blog Cache Import
+Sub-Package SIMPLEBLOG.COMMANDS
+Copyright (C) 2012-2013 by Peter A. Donis
+
+Released under the GNU General Public License, Version 2
+See the LICENSE and README files for more information
+"""
+
+from simpleblog.caching import import_caches
+from simpleblog.commands import BlogCommand
+
+
+class ImportCaches(BlogCommand):
+    """Import entry metadata cache files into the SQLite cache store.
+    """
+    
+    options = (
+        ("-q", "--quiet", {
+            'action': 'store_true',
+            'help': "suppress console output"
+        }),
+    )
+    
+    def run(self, blog):
+        for cachename, count in import_caches(blog):
+            if not self.opts.quiet:
+                print("Imported", count, "items from", cachename)
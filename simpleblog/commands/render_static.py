@@ -12,7 +12,29 @@ import os
 
 from plib.stdlib.ostools import data_changed
 
+from simpleblog import BlogConfigError
+from simpleblog.caching import flush_caches, save_caches
 from simpleblog.commands import BlogCommand
+from simpleblog.deps import BlogDependencies
+from simpleblog.pipeline import (
+    page_items, write_stage, render_items_hooked, render_pipeline
+)
+
+
+# Command and pages shared with worker processes; this is set before
+# the worker pool is forked, so workers inherit the fully built blog
+# graph copy-on-write instead of having it pickled and sent to them
+worker_state = None
+
+
+def render_page(index):
+    command, pages = worker_state
+    # Unpacking runs the pipeline to completion, so the page is released
+    [result] = write_stage(page_items([pages[index]]), command.write_item)
+    # Workers never save caches; the parent saves them (including what
+    # every worker stored) once all the pages are rendered
+    flush_caches()
+    return result
 
 
 class RenderStatic(BlogCommand):
@@ -23,11 +45,26 @@ class RenderStatic(BlogCommand):
         static_dir="static"
     )
     
+    warm_start = True
+    
     options = (
         ("-f", "--force", {
             'action': 'store_true',
             'help': "force writing of unchanged files"
         }),
+        ("-i", "--incremental", {
+            'action': 'store_true',
+            'help': "only render pages whose inputs have changed"
+        }),
+        ("-j", "--jobs", {
+            'action': 'store', 'type': int,
+            'default': 1,
+            'help': "number of worker processes to render pages with"
+        }),
+        ("-l", "--low-memory", {
+            'action': 'store_true',
+            'help': "keep no cached entry data between pages"
+        }),
         ("-q", "--quiet", {
             'action': 'store_true',
             'help': "suppress console output"
@@ -38,17 +75,95 @@ class RenderStatic(BlogCommand):
         })
     )
     
+    def static_path(self, path):
+        return os.path.abspath(os.path.join(self.static_dir, path))
+    
+    def write_item(self, data, path):
+        path = self.static_path(path)
+        if self.opts.force or data_changed(data, path):
+            dir = os.path.split(path)[0]
+            if not os.path.isdir(dir):
+                os.makedirs(dir, exist_ok=True)
+            with open(path, 'wb') as f:
+                f.write(data)
+            return path, True
+        return path, False
+    
+    def memory_budget(self, blog):
+        # No budget (None) means entry data is kept until no remaining
+        # page needs it; a budget of 0 keeps none, like --low-memory
+        if self.opts.low_memory:
+            return 0
+        budget = blog.render_memory_budget
+        return None if budget is None else int(budget)
+    
+    def serial_items(self, blog):
+        return render_pipeline(blog, self.write_item, self.memory_budget(blog))
+    
+    def parallel_items(self, blog):
+        global worker_state
+        import multiprocessing
+        pages = blog.render_pages
+        worker_state = (self, pages)
+        chunksize = max(len(pages) // (self.opts.jobs * 4), 1)
+        try:
+            with multiprocessing.get_context('fork').Pool(self.opts.jobs) as pool:
+                for result in pool.imap(render_page, range(len(pages)), chunksize):
+                    yield result
+        finally:
+            worker_state = None
+        # The workers render all the pages, so the parent only has to
+        # render any extra items that extensions add
+        for result in write_stage(blog.extra_render_items, self.write_item):
+            yield result
+    
     def run(self, blog):
-        for data, path in blog.render_items:
-            path = os.path.abspath(os.path.join(self.static_dir, path))
-            if self.opts.force or data_changed(data, path):
+        if (self.opts.jobs > 1) and (self.memory_budget(blog) is not None):
+            # Each worker renders its own pages with its own copy of the
+            # entries, so entry data is not tracked across pages
+            raise BlogConfigError(
+                "--jobs can't be used with --low-memory or render_memory_budget"
+            )
+        if (self.opts.jobs > 1) and render_items_hooked():
+            # The workers stream their pages, so hooks on the full list
+            # of render items would never see it
+            raise BlogConfigError(
+                "--jobs can't be used with extensions that hook render_items"
+            )
+        graph = blog.graph
+        if not self.opts.force and graph.outputs_unchanged():
+            # Nothing the blog is derived from, and none of the files
+            # last written, has changed, so there is nothing to render
+            if self.opts.show_unchanged:
+                for path in graph.outputs:
+                    print(path, "is unchanged")
+            return
+        deps = BlogDependencies(blog) if self.opts.incremental else None
+        if deps:
+            blog.render_pages = [
+                page for page in blog.pages
+                if self.opts.force
+                or deps.changed(page)
+                or not os.path.isfile(self.static_path(page.filepath))
+            ]
+        items = (
+            self.parallel_items(blog) if self.opts.jobs > 1 else
+            self.serial_items(blog)
+        )
+        paths = []
+        for path, written in items:
+            paths.append(path)
+            if written:
                 if not self.opts.quiet:
                     print("Rendering", path)
-                dir = os.path.split(path)[0]
-                if not os.path.isdir(dir):
-                    os.makedirs(dir)
-                with open(path, 'wb') as f:
-                    f.write(data)
             else:
                 if self.opts.show_unchanged:
                     print(path, "is unchanged")
+        if deps:
+            for page in blog.pages:
+                deps.update(page)
+            deps.save()
+            # Pages that didn't need rendering are still outputs
+            paths.extend(self.static_path(page.filepath) for page in blog.pages)
+        save_caches()
+        graph.save(list(dict.fromkeys(paths)))
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Module DEPS -- Simple Blog Page Dependency Graph
+Package SIMPLEBLOG
+Copyright (C) 2012-2013 by Peter A. Donis
+
+Released under the GNU General Public License, Version 2
+See the LICENSE and README files for more information
+"""
+
+import os
+import json
+
+from plib.stdlib.decotools import cached_property
+
+from simpleblog import BlogObject
+
+
+class BlogDependencies(BlogObject):
+    """Persisted graph of the inputs each blog page is rendered from.
+    
+    The graph records, for each page, the names of the inputs given by
+    the page's ``dependencies`` property, and for each input, the stamp
+    it had when the page was last rendered. A page only needs to be
+    rendered again if its set of inputs, or the stamp of any of them,
+    has changed since then.
+    """
+    
+    config_vars = dict(
+        deps_file="deps"
+    )
+    
+    def __init__(self, blog):
+        BlogObject.__init__(self, blog)
+        self.nodes = {}
+        self.pages = {}
+    
+    @cached_property
+    def cache_dir(self):
+        return self.config.get('cache_dir', self.entries_dir)
+    
+    @cached_property
+    def filename(self):
+        return os.path.join(self.cache_dir, self.deps_file)
+    
+    @cached_property
+    def graph(self):
+        try:
+            with open(self.filename, 'r') as f:
+                graph = json.load(f)
+        except (IOError, ValueError):
+            return dict(nodes={}, pages={})
+        else:
+            return graph
+    
+    def changed(self, page):
+        """Return whether any input of ``page`` changed since last render.
+        """
+        names = self.graph['pages'].get(page.filepath)
+        deps = page.dependencies
+        if (names is None) or (set(names) != set(deps)):
+            return True
+        nodes = self.graph['nodes']
+        return any(nodes.get(name) != stamp for name, stamp in deps.items())
+    
+    def update(self, page):
+        """Record the current inputs of ``page`` in the new graph.
+        """
+        deps = page.dependencies
+        self.nodes.update(deps)
+        self.pages[page.filepath] = sorted(deps)
+    
+    def save(self):
+        # Write to a temporary file and rename it so an interrupted
+        # build never leaves a truncated graph behind
+        tmpname = "{}.tmp".format(self.filename)
+        with open(tmpname, 'w') as f:
+            json.dump(dict(nodes=self.nodes, pages=self.pages), f, sort_keys=True)
+        os.replace(tmpname, self.filename)
@@ -8,7 +8,7 @@ Released under the GNU General Public License, Version 2
 See the LICENSE and README files for more information
 """
 
-from simpleblog import BlogError
+from simpleblog import BlogError, compile_extensions
 from simpleblog.extensions import BlogExtension
 from simpleblog.sub import load_subs
 
@@ -28,3 +28,5 @@ def load(config, extensions):
     )
     for mod, klass in exts:
         mod.extension = klass(config)
+    # Now that all extensions are registered, build the dispatch table
+    compile_extensions()
@@ -55,6 +55,10 @@ class NamedEntries(BlogEntries):
     def prev_next_suffix(self):
         return self.name
     
+    @cached_property
+    def sourcetype_group(self):
+        return self.sourcetype_attrname
+    
     def _get_sourcetype_sources(self):
         if self.sourcetype_attrname:
             return sorted(getattr(self.blog, self.sourcetype_attrname), key=attrgetter('sortkey'), reverse=True)
@@ -9,8 +9,10 @@ See the LICENSE and README files for more information
 """
 
 from collections import defaultdict
+from datetime import datetime, timedelta
 from operator import attrgetter
 
+from plib.stdlib.decotools import cached_property
 from plib.stdlib.localize import monthname, monthname_long
 
 from simpleblog import BlogEntries
@@ -46,6 +48,8 @@ class BlogArchiveEntries(BlogEntries):
     
     default_heading = "Archive: {title}"
     
+    presorted = True
+    
     def __init__(self, blog, year, month=0, day=0):
         BlogEntries.__init__(self, blog)
         self.year = year
@@ -87,16 +91,36 @@ class BlogArchiveEntries(BlogEntries):
             return self.blog.month_entries[(self.year, self.month)]
         return self.blog.year_entries[self.year]
     
+    # Archives link to the other archives at the same level within the
+    # enclosing period, including the archive for that period itself
+    
+    @cached_property
+    def sourcetype_group(self):
+        return archive_group(self.year, self.month, self.day)
+    
     def _get_sourcetype_sources(self):
-        archives = self.blog.all_archives
-        if self.month:
-            if self.day:
-                match = lambda a: (a.year == self.year) and (a.month == self.month)
-            else:
-                match = lambda a: (a.year == self.year) and (a.day == 0)
-        else:
-            match = lambda a: (a.month == 0) and (a.day == 0)
-        return sorted((a for a in archives if match(a)), key=attrgetter('sortkey'))
+        return self.blog.archive_groups.get(self.sourcetype_group, [])
+
+
+def archive_period(year, month=0, day=0):
+    """Return the start and end datetimes of an archive's period.
+    """
+    if month:
+        if day:
+            start = datetime(year, month, day)
+            return start, start + timedelta(days=1)
+        return datetime(year, month, 1), (
+            datetime(year + 1, 1, 1) if month == 12 else datetime(year, month + 1, 1)
+        )
+    return datetime(year, 1, 1), datetime(year + 1, 1, 1)
+
+
+def archive_group(year, month, day):
+    if month:
+        if day:
+            return (year, month)
+        return (year,)
+    return ()
 
 
 class ArchivesExtension(BlogExtension):
@@ -118,17 +142,26 @@ class ArchivesExtension(BlogExtension):
         blog.month_entries = defaultdict(list)
         blog.day_entries = defaultdict(list)
         
-        def archive_containers(t):
+        def archive_keys(t):
             if self.archive_years:
-                yield blog.year_entries[t.year]
+                yield blog.year_entries, t.year, (t.year,)
             if self.archive_months:
-                yield blog.month_entries[(t.year, t.month)]
+                yield blog.month_entries, (t.year, t.month), (t.year, t.month)
             if self.archive_days:
-                yield blog.day_entries[(t.year, t.month, t.day)]
+                key = (t.year, t.month, t.day)
+                yield blog.day_entries, key, key
         
-        for entry in blog.all_entries:
-            for container in archive_containers(entry.timestamp):
-                container.append(entry)
+        entries_between = getattr(blog, 'entries_between', None)
+        for entry in blog.sorted_entries:
+            for index, key, period in archive_keys(entry.timestamp):
+                if entries_between is None:
+                    # Going through entries in master order means each
+                    # archive's entries are already sorted
+                    index[key].append(entry)
+                elif key not in index:
+                    # Timestamps are cached (by the timestamps extension),
+                    # so each archive's entries are queried from the cache
+                    index[key] = entries_between(*archive_period(*period))
         
         blog.all_archives = []
         archive_links = []
@@ -160,6 +193,17 @@ class ArchivesExtension(BlogExtension):
             if self.archive_link_days:
                 archive_links.extend(days)
         
+        # Group archives for next/previous links in a single pass; year
+        # and month archives are also in the group of their sub-periods
+        blog.archive_groups = defaultdict(list)
+        for archive in blog.all_archives:
+            year, month, day = archive.year, archive.month, archive.day
+            blog.archive_groups[archive_group(year, month, day)].append(archive)
+            if not day:
+                blog.archive_groups[(year, month) if month else (year,)].append(archive)
+        for group in blog.archive_groups.values():
+            group.sort(key=attrgetter('sortkey'))
+        
         blog.metadata.update(
             archive_links=self.get_links(archive_links, True)
         )
@@ -9,8 +9,7 @@ See the LICENSE and README files for more information
 """
 
 import os
-
-from plib.stdlib.ostools import subdirs
+import sys
 
 from simpleblog import extendable_property
 from simpleblog.extensions import BlogExtension, EntryMixin, NamedEntries
@@ -28,10 +27,10 @@ class BlogCategory(NamedEntries):
     typename = "Category"
     sourcetype_attrname = 'all_categories'
     
+    presorted = True
+    
     def _get_entries(self):
-        return [
-            e for e in self.blog.all_entries if e.category == self.name
-        ]
+        return self.blog.entries_by('category').get(self.name, ())
 
 
 class CategoryEntryMixin(EntryMixin):
@@ -62,7 +61,8 @@ class CategoryExtension(BlogExtension):
     def entry_post_init(self, entry):
         # The category will be an empty string for entries in
         # the root entries dir instead of a subdir
-        entry._category, entry._name = os.path.split(entry.cachekey)
+        category, name = os.path.split(entry.cachekey)
+        entry._category, entry._name = sys.intern(category), sys.intern(name)
         
         # Use entry.category instead of entry._category here and elsewhere
         # in case the property is extended elsewhere
@@ -70,8 +70,9 @@ class CategoryExtension(BlogExtension):
             link = self.make_category_link(entry)
         else:
             link = self.no_category_link
+        # Entries in the same category all have the same link
         entry.metadata.update(
-            categorylink=link
+            categorylink=sys.intern(link)
         )
     
     def entry_mod_attrs(self, entry, attrs, format, params):
@@ -85,13 +86,13 @@ class CategoryExtension(BlogExtension):
         # subdir defines a category)
         return all_entries + [
             blog.entry_class(blog, os.path.join(subdir, name))
-            for subdir in subdirs(blog.entries_dir)
+            for subdir in blog.snapshot.subdirs
             for name in blog.filter_entries(os.path.join(blog.entries_dir, subdir))
         ]
     
     def blog_mod_sources(self, blog, sources):
         
-        blog.category_names = set(subdirs(blog.entries_dir))
+        blog.category_names = set(blog.snapshot.subdirs)
         
         blog.all_categories = [
             BlogCategory(blog, catname)
@@ -9,20 +9,31 @@ See the LICENSE and README files for more information
 """
 
 import re
+from collections import defaultdict
 from datetime import datetime
-from itertools import groupby
+from heapq import nlargest
+from operator import attrgetter
 
-from plib.stdlib.decotools import cached_property, cached_method
+from plib.stdlib.decotools import cached_function, cached_property, cached_method
 from plib.stdlib.localize import weekdayname, monthname, monthname_long
-from plib.stdlib.tztools import UTCTimezone, LocalTimezone
 
-from simpleblog import extendable_property, BlogEntries, newline
+from simpleblog import extendable_property, BlogEntries, BlogIndex, newline, value_stamp
 from simpleblog.extensions import BlogExtension, BlogMixin, EntryMixin
 
 
-tz_utc = UTCTimezone()
+# The time zone objects are only created (and their module imported)
+# when feed timestamps are first needed
 
-tz_local = LocalTimezone()
+@cached_function
+def tz_utc():
+    from plib.stdlib.tztools import UTCTimezone
+    return UTCTimezone()
+
+
+@cached_function
+def tz_local():
+    from plib.stdlib.tztools import LocalTimezone
+    return LocalTimezone()
 
 
 archive_marker = "<fh:archive />"
@@ -33,9 +44,16 @@ archive_rel_tmpl = '<link rel="{}-archive" href="{}{}{}.{}" />'
 
 archive_rel_specs = ('prev', 'next')
 
+archive_periods = ('year', 'month', 'day')
+
 
 class BlogCurrentFeedEntries(BlogEntries):
     """Current syndication feed entries.
+    
+    Feed containers are created from the feed extension's period index:
+    ``arglist`` is the list of periods in order, ``argindex`` is the
+    position of this container's period in it, and ``period_entries``
+    are the entries in that period, in master order.
     """
     
     config_vars = dict(
@@ -54,11 +72,14 @@ class BlogCurrentFeedEntries(BlogEntries):
     
     is_current_feed = True
     
-    def __init__(self, blog, arglist, *args):
+    presorted = True
+    
+    def __init__(self, blog, arglist, argindex, period_entries):
         BlogEntries.__init__(self, blog)
         self.arglist = arglist
-        self.args = args
-        self.argindex = i = arglist.index(args)
+        self.argindex = i = argindex
+        self.args = args = arglist[i]
+        self.period_entries = period_entries
         
         assert self.is_current_feed == (i == (len(arglist) - 1))
         
@@ -79,15 +100,8 @@ class BlogCurrentFeedEntries(BlogEntries):
             str(arg).rjust(2, '0') for arg in args
         )
     
-    @cached_method
-    def entry_match(self, entry):
-        t = entry.timestamp
-        return (t.year, t.month, t.day)[:len(self.args)] == self.args
-    
     def _get_entries(self):
-        for entry in self.blog.all_entries:
-            if self.entry_match(entry):
-                yield entry
+        return self.period_entries
     
     @cached_method
     def args_urlshort(self, *args):
@@ -156,6 +170,34 @@ class BlogArchiveFeedEntries(BlogCurrentFeedEntries):
         return super(BlogArchiveFeedEntries, self)._get_urlpath()
 
 
+class BlogFeedWindow(BlogIndex):
+    """The newest entries in the blog, for feeds that are not archived.
+    
+    The window has its own source type, so extensions that handle each
+    ``blog`` source (such as ``links``) only see the blog index.
+    """
+    
+    sourcetype = 'feed'
+    
+    def __init__(self, blog, max_entries):
+        BlogIndex.__init__(self, blog)
+        self.max_entries = max_entries
+    
+    def _get_entries(self):
+        blog = self.blog
+        n = self.max_entries
+        if (blog.entry_sort_key == 'timestamp') and blog.entry_sort_reversed:
+            # The master order is newest first, so the window is its head
+            return blog.sorted_entries[:n]
+        # Otherwise pick the newest entries without sorting all of them,
+        # and put just those in master order
+        return sorted(
+            nlargest(n, blog.all_entries, key=attrgetter('timestamp')),
+            key=attrgetter(blog.entry_sort_key),
+            reverse=blog.entry_sort_reversed
+        )
+
+
 template_rss = "{0}, {1.day:02d} {2} {1.year} {1.hour:02d}:{1.minute:02d} GMT"
 
 template_atom = "{0.year}-{0.month:02d}-{0.day:02d}T{0.hour:02d}:{0.minute:02d}:00Z"
@@ -183,8 +225,8 @@ class FeedEntryMixin(EntryMixin):
     def timestamp_utc(self):
         t = self.timestamp
         if self.utc_timestamps:
-            return datetime(t.year, t.month, t.day, t.hour, t.minute, t.second, tzinfo=tz_utc)
-        return datetime(t.year, t.month, t.day, t.hour, t.minute, t.second, tzinfo=tz_local).astimezone(tz_utc)
+            return datetime(t.year, t.month, t.day, t.hour, t.minute, t.second, tzinfo=tz_utc())
+        return datetime(t.year, t.month, t.day, t.hour, t.minute, t.second, tzinfo=tz_local()).astimezone(tz_utc())
     
     @extendable_property()
     def timestamp_atom(self):
@@ -238,6 +280,9 @@ class FeedExtension(BlogExtension):
     
     config_vars = dict(
         archive_feeds=None,
+        feed_max_entries=dict(
+            vartype=int,
+            default=0),
         atom_id_template="{cachekey}",
         atom_category_template="entries",
         rss_id_template="{cachekey}",
@@ -299,6 +344,19 @@ class FeedExtension(BlogExtension):
                 )
         return attrs
     
+    def page_mod_dependencies(self, page, deps):
+        if page.format in page.blog.feed_formats:
+            # Entry attrs in feed formats use these blog metadata keys
+            deps.update(
+                ("metadata:{}".format(key), value_stamp(page.blog.metadata.get(key)))
+                for key in ('root_url', 'author', 'email', 'language', 'country')
+            )
+            if self.archive_feeds and (page.format in page.blog.archive_feed_formats):
+                deps["archive:{}".format(page.filepath)] = value_stamp(
+                    page.source.archive_elements(page.format)
+                )
+        return deps
+    
     def blog_mod_required_metadata(self, blog, data):
         data.update([
             'root_url',
@@ -322,32 +380,49 @@ class FeedExtension(BlogExtension):
             )
         return data
     
+    @cached_method
+    def archive_feed_index(self, blog):
+        """Return index of entries by archive feed period.
+        
+        The index maps each period (a tuple of year, month, and day, as
+        far as the ``archive_feeds`` setting goes) to the entries in it;
+        it is built in a single pass over the blog's entries in master
+        order, so each period's entries are already sorted.
+        """
+        size = archive_periods.index(self.archive_feeds) + 1
+        index = defaultdict(list)
+        for entry in blog.sorted_entries:
+            t = entry.timestamp
+            index[(t.year, t.month, t.day)[:size]].append(entry)
+        return index
+    
     @cached_method
     def archive_feed_args(self, blog):
-        eattrs = ('year', 'month', 'day')
-        eattrs = eattrs[:eattrs.index(self.archive_feeds) + 1]
-        return [
-            groupkey for groupkey, _ in groupby(
-                sorted(e.timestamp for e in blog.all_entries),
-                lambda t: tuple(
-                    getattr(t, attrname) for attrname in eattrs
-                )
-            )
-        ]
+        return sorted(self.archive_feed_index(blog))
+    
+    def feed_entries(self, blog, klass, argindex):
+        arglist = self.archive_feed_args(blog)
+        return klass(blog, arglist, argindex, self.archive_feed_index(blog)[arglist[argindex]])
     
     @cached_method
     def current_feed_entries(self, blog):
-        arglist = self.archive_feed_args(blog)
-        return BlogCurrentFeedEntries(blog, arglist, *arglist[-1])
+        return self.feed_entries(
+            blog, BlogCurrentFeedEntries, len(self.archive_feed_args(blog)) - 1
+        )
     
     @cached_method
-    def archive_feed_entries(self, blog, *args):
-        arglist = self.archive_feed_args(blog)
-        return BlogArchiveFeedEntries(blog, arglist, *args)
+    def archive_feed_entries(self, blog, argindex):
+        return self.feed_entries(blog, BlogArchiveFeedEntries, argindex)
+    
+    @cached_method
+    def feed_window(self, blog):
+        return BlogFeedWindow(blog, self.feed_max_entries)
     
     def blog_mod_index_entries(self, blog, entries, format):
         if self.archive_feeds and (format in blog.archive_feed_formats):
             return self.current_feed_entries(blog)
+        if self.feed_max_entries and (format in blog.feed_formats):
+            return self.feed_window(blog)
         return entries
     
     def blog_mod_sources(self, blog, sources):
@@ -366,10 +441,9 @@ class FeedExtension(BlogExtension):
         )
         
         if self.archive_feeds:
-            arglist = self.archive_feed_args(blog)
             sources.extend(
-                (self.archive_feed_entries(blog, *args), format)
-                for args in arglist[:-1]
+                (self.archive_feed_entries(blog, argindex), format)
+                for argindex in range(len(self.archive_feed_args(blog)) - 1)
                 for format in blog.archive_feed_formats
             )
         
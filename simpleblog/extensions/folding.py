@@ -8,7 +8,7 @@ Released under the GNU General Public License, Version 2
 See the LICENSE and README files for more information
 """
 
-from plib.stdlib.decotools import cached_method
+from plib.stdlib.decotools import cached_method, cached_property
 
 from simpleblog import (
     extendable_property, extendable_method,
@@ -26,6 +26,8 @@ class FoldEntryMixin(EntryMixin):
             default=["html"])
     )
     
+    evict_names = ('_short', 'has_short', 'rendered_parts', 'rendered_short')
+    
     @extendable_property()
     def fold_marker(self):
         if self.fold_inline:
@@ -58,10 +60,26 @@ class FoldEntryMixin(EntryMixin):
             return self.template_data("short", format)
         raise NotImplementedError
     
+    @cached_property
+    def rendered_parts(self):
+        """Return the rendered short part and the rendered whole entry.
+        
+        Both come from a single ``render_split``, so renderers that can
+        do that in one pass only have to convert the entry once. If a
+        loader that runs after this mixin's (such as the title mixin,
+        if it comes first in the entry's bases) changed the start of
+        the entry, the short part is no longer a prefix of it, so the
+        two are rendered separately.
+        """
+        raw = self.load()
+        short = self._short
+        if raw.startswith(short):
+            return self.render_split(short, raw[len(short):])
+        return self.render(short), self.render(raw)
+    
     @extendable_property()
     def rendered_short(self):
-        self.load()
-        return self.render(self._short)
+        return self.rendered_parts[0]
 
 
 class FoldingExtension(BlogExtension):
@@ -75,20 +93,37 @@ class FoldingExtension(BlogExtension):
             default=1)
     )
     
-    def page_mod_entry_params(self, page, params, entry):
-        params.update(
-            index=page.entries.index(entry)
-        )
+    def page_mod_entry_params(self, page, params, entry, index):
+        # Only whether the entry is short goes into the params, not its
+        # index, so the formatted entry can be reused on other pages
+        if index > self.max_index_full:
+            return params.updated(
+                force_short=True
+            )
         return params
     
+    def page_mod_dependencies(self, page, deps):
+        entries = page.entries
+        if entries and (page.format in entries[0].short_formats):
+            deps["template:{}".format(page.template_basename("short", page.format))] = (
+                page.template_stamp("short", page.format)
+            )
+        return deps
+    
     @cached_method
     def use_short_entry(self, params):
         return (
-            # This first clause allows other extensions to force a short entry
+            # Other extensions can also force a short entry this way
             params.get('force_short', False)
-            or (params.index > self.max_index_full)
         )
     
+    def entry_get_rendered(self, entry):
+        # A folded entry gets its full rendering along with the short one
+        entry.load()
+        if entry._short is not None:
+            return entry.rendered_parts[1]
+        return noresult
+    
     def entry_get_body(self, entry, format, params):
         if self.use_short_entry(params) and entry.has_short(format):
             return entry.short_template(format).format(
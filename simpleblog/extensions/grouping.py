@@ -35,21 +35,22 @@ class GroupingPageMixin(PageMixin):
     
     def _get_format_entries(self):
         if self.format in self.group_formats:
+            groupkey_of = attrgetter(self.group_key)
             for groupindex, (groupkey, group) in enumerate(groupby(
-                self.entries, attrgetter(self.group_key)
+                enumerate(self.entries), lambda item: groupkey_of(item[1])
             )):
                 params = {
                     self.groupindex_key: groupindex,
                     self.group_key: groupkey
                 }
                 yield self.group_head_template.format(**params)
-                group_params = dict(
-                    groupindex=groupindex,
-                    groupkey=groupkey
-                )
-                for entry in group:
-                    entryparams = self.entry_params(entry)
-                    entryparams.update(group_params)
+                # The group index differs from page to page, so entries
+                # are only shared by pages where they are in the same group
+                for index, entry in group:
+                    entryparams = self.entry_params(entry, index).updated(
+                        groupindex=groupindex,
+                        groupkey=groupkey
+                    )
                     yield entry.formatted(self.format, entryparams)
                 yield self.group_foot_template.format(**params)
         else:
@@ -60,4 +61,12 @@ class GroupingPageMixin(PageMixin):
 class GroupingExtension(BlogExtension):
     """Group page entries by date.
     """
-    pass
+    
+    def page_mod_dependencies(self, page, deps):
+        if page.entries and (page.format in page.group_formats):
+            deps.update(
+                ("template:{}".format(page.template_basename("group", part)),
+                 page.template_stamp("group", part))
+                for part in ("head", "foot")
+            )
+        return deps
@@ -110,6 +110,18 @@ class IndexesExtension(BlogExtension):
             result.append(True)
         return result
     
+    def page_mod_dependencies(self, page, deps):
+        if isinstance(page, BlogIndexPage):
+            # Index pages link to every entry in the blog
+            deps.update(
+                ("entry:{}".format(entry.cachekey), entry.stamp)
+                for entry in page.blog.all_entries
+            )
+            deps["template:{}".format(page.template_basename("index", "links"))] = (
+                page.template_stamp("index", "links")
+            )
+        return deps
+    
     def blog_mod_pages(self, blog, pages):
         pages.extend(
             BlogIndexPage(blog, format, alpha)
@@ -13,7 +13,7 @@ from operator import itemgetter
 
 from plib.stdlib.decotools import cached_property, cached_method
 
-from simpleblog import shared_property, extendable_method, newline
+from simpleblog import shared_property, extendable_method, newline, value_stamp
 from simpleblog.extensions import BlogExtension, EntryMixin
 
 
@@ -30,6 +30,8 @@ class LinksEntryMixin(EntryMixin):
             default=['entry'])
     )
     
+    release_names = ('make_entrylinks',)
+    
     @shared_property
     def entrylinks_template(self):
         return self.template_data("entry", "links")
@@ -96,22 +98,34 @@ class LinksExtension(BlogExtension):
         )
         return attrs
     
-    def page_mod_entry_params(self, page, params, entry):
-        params.update(
+    def page_mod_entry_params(self, page, params, entry, index):
+        return params.updated(
             sourcetype=page.source.sourcetype
         )
-        return params
     
     def page_mod_attrs(self, page, attrs):
         attrs.update(
             page_entrylinks=(
-                page.source.make_entrylinks(page.format, page.entry_params(page.source))
+                page.source.make_entrylinks(page.format, page.entry_params(page.source, 0))
                 if page.source and (page.source.sourcetype == 'entry')
                 else ""
             )
         )
         return attrs
     
+    def page_mod_dependencies(self, page, deps):
+        entries = page.entries or ()
+        deps.update(
+            ("entrylinks:{}.{}".format(entry.cachekey, page.format),
+             value_stamp(entry.prev_next_attrs(page.format)))
+            for entry in entries
+        )
+        if entries:
+            deps["template:{}".format(page.template_basename("entry", "links"))] = (
+                page.template_stamp("entry", "links")
+            )
+        return deps
+    
     def blog_mod_sources(self, blog, sources):
         prev_tmpl = 'prev_in_{}'
         next_tmpl = 'next_in_{}'
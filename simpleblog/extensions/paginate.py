@@ -10,7 +10,7 @@ See the LICENSE and README files for more information
 
 from plib.stdlib.decotools import cached_method
 
-from simpleblog import BlogEntries, noresult, newline
+from simpleblog import BlogEntries, noresult, newline, value_stamp
 from simpleblog.extensions import BlogExtension
 
 
@@ -34,6 +34,9 @@ class PageEntries(BlogEntries):
         page_older_label="Older Entries",
     )
     
+    # Each page is a slice of its source's entries, which are sorted
+    presorted = True
+    
     def __init__(self, blog, source, pagenum):
         BlogEntries.__init__(self, blog)
         self.orig_source = source
@@ -109,7 +112,7 @@ class PaginateExtension(BlogExtension):
             return page.source.orig_source
         return noresult
     
-    def page_mod_entry_params(self, page, params, entry):
+    def page_mod_entry_params(self, page, params, entry, index):
         if self.page_force_short:
             try:
                 pagenum = page.source.pagenum
@@ -117,7 +120,7 @@ class PaginateExtension(BlogExtension):
                 pass
             else:
                 if pagenum > 0:
-                    params.update(
+                    return params.updated(
                         force_short=True
                     )
         return params
@@ -144,6 +147,13 @@ class PaginateExtension(BlogExtension):
         )
         return attrs
     
+    def page_mod_dependencies(self, page, deps):
+        if isinstance(page.source, PageEntries):
+            deps["pagelinks:{}".format(page.filepath)] = value_stamp(
+                page.source.make_pagelinks(page.format)
+            )
+        return deps
+    
     @cached_method
     def paginate(self, source, format):
         return (
@@ -10,18 +10,292 @@ See the LICENSE and README files for more information
 
 import os
 import re
+import threading
 from codecs import encode
 from importlib import import_module
-
-from markdown import Markdown
+from importlib.util import find_spec
 
 from plib.stdlib.classtools import first_subclass
+from plib.stdlib.decotools import cached_function
 from plib.stdlib.systools import tmp_sys_path
 
-from simpleblog import extendable_property, newline
+from simpleblog import (
+    BlogConfigError, shared_property, extendable_property, newline, file_stamp)
 from simpleblog.extensions import BlogExtension, EntryMixin
 
 
+# Markdown is only imported when an entry is actually rendered, so commands
+# that don't render anything don't pay for importing it
+
+def markdown_version():
+    try:
+        from markdown import __version_info__ as version
+    except ImportError:
+        from markdown import version_info as version
+    return version
+
+
+def pygments_version():
+    try:
+        from pygments import __version__ as version
+    except ImportError:
+        version = None
+    return version
+
+
+class MarkdownBackend(object):
+    """Converter using Python-Markdown.
+    
+    This is the reference backend, which other backends are checked
+    against (see the ``check-markdown`` command). Backends are the
+    converters entries use, so they have the same interface as
+    Python-Markdown's converters: ``convert`` and ``reset``.
+    """
+    
+    module = "markdown"
+    
+    def __init__(self, output_format, highlight_code, highlight_auto, highlight_cache=None):
+        from markdown import Markdown
+        kwargs = dict(
+            output_format=output_format
+        )
+        if highlight_code:
+            from simpleblog.highlight import CachedCodeHiliteExtension
+            kwargs.update(
+                extensions=[CachedCodeHiliteExtension(highlight_cache, guess_lang=highlight_auto)]
+            )
+        self.md = Markdown(**kwargs)
+    
+    @classmethod
+    def available(cls):
+        return find_spec(cls.module) is not None
+    
+    @classmethod
+    def version(cls):
+        return markdown_version()
+    
+    def convert(self, source):
+        return self.md.convert(source)
+    
+    def reset(self):
+        self.md.reset()
+
+
+class FastBackend(MarkdownBackend):
+    """Base class for backends using other Markdown engines.
+    
+    Subclasses implement ``to_html``. If highlighting is on, code blocks
+    in the engine's output are highlighted afterwards, the same way as
+    the codehilite extension does it (so Python-Markdown still has to be
+    installed for that).
+    
+    These backends are experimental: their output is not the same as
+    Python-Markdown's for all documents (for example, whitespace between
+    block elements, and list items containing paragraphs, come out
+    differently), so a blog should be run through ``check-markdown``
+    before it uses one.
+    """
+    
+    def __init__(self, output_format, highlight_code, highlight_auto, highlight_cache=None):
+        self.output_format = output_format
+        if highlight_code:
+            from simpleblog.highlight import block_highlighter
+            self.highlighter = block_highlighter(highlight_auto, highlight_cache)
+        else:
+            self.highlighter = None
+    
+    @classmethod
+    def version(cls):
+        from importlib.metadata import version, PackageNotFoundError
+        try:
+            return version(cls.module)
+        except PackageNotFoundError:
+            return None
+    
+    def to_html(self, source):
+        raise NotImplementedError
+    
+    def convert(self, source):
+        html = self.to_html(source)
+        if self.highlighter is not None:
+            html = self.highlighter.highlight_html(html)
+        # Python-Markdown doesn't end its output with a newline
+        return html.strip(newline)
+    
+    def reset(self):
+        pass
+
+
+class Markdown2Backend(FastBackend):
+    """Converter using the ``markdown2`` package.
+    """
+    
+    module = "markdown2"
+    
+    def __init__(self, output_format, highlight_code, highlight_auto, highlight_cache=None):
+        FastBackend.__init__(self, output_format, highlight_code, highlight_auto, highlight_cache)
+        from markdown2 import Markdown
+        self.md = Markdown(html4tags=not output_format.startswith("xhtml"))
+    
+    def to_html(self, source):
+        return str(self.md.convert(source))
+    
+    def reset(self):
+        self.md.reset()
+
+
+# Empty elements as mistune writes them, which is always XHTML style
+
+xhtml_empty_tag = re.compile(r'<((?:br|hr|img)\b[^>]*?)\s*/>')
+
+
+class MistuneBackend(FastBackend):
+    """Converter using the ``mistune`` package.
+    
+    Mistune only writes XHTML, so for HTML output formats its empty
+    elements are rewritten without the closing slash.
+    """
+    
+    module = "mistune"
+    
+    def __init__(self, output_format, highlight_code, highlight_auto, highlight_cache=None):
+        FastBackend.__init__(self, output_format, highlight_code, highlight_auto, highlight_cache)
+        from mistune import create_markdown
+        self.md = create_markdown(escape=False)
+        self.xhtml = output_format.startswith("xhtml")
+    
+    def to_html(self, source):
+        html = self.md(source)
+        if not self.xhtml:
+            html = xhtml_empty_tag.sub(r'<\1>', html)
+        return html
+
+
+markdown_backends = dict(
+    markdown=MarkdownBackend,
+    markdown2=Markdown2Backend,
+    mistune=MistuneBackend
+)
+
+reference_backend = "markdown"
+
+
+@cached_function
+def select_backend(name):
+    """Return the name of the backend to use for backend setting ``name``.
+    
+    Backends are only used if they are named explicitly; none is
+    picked automatically, since the others are experimental.
+    """
+    try:
+        backend = markdown_backends[name]
+    except KeyError:
+        raise BlogConfigError("unknown Markdown backend {}".format(name))
+    if not backend.available():
+        raise BlogConfigError("Markdown backend {} is not installed".format(name))
+    return name
+
+
+# Markdown converters are expensive to build (especially with extensions,
+# whose specs have to be parsed and processors registered), so one is kept
+# for each combination of settings, per thread; worker processes get their
+# own copies when they are forked
+
+converter_pool = threading.local()
+
+
+def shared_converter(backend, output_format, highlight_code, highlight_auto, highlight_cache=None):
+    """Return the converter for the given backend and settings in this thread.
+    
+    The converter is reset after each document it converts (see the
+    ``convert`` method of ``MarkdownEntryMixin``), so it can be used
+    for any number of entries. Highlighted code blocks are looked up
+    in ``highlight_cache`` (a ``BlogRenderCache``), if it is given.
+    """
+    converters = converter_pool.__dict__.setdefault('converters', {})
+    key = (backend, output_format, highlight_code, highlight_auto, highlight_cache)
+    try:
+        return converters[key]
+    except KeyError:
+        converter = converters[key] = markdown_backends[backend](
+            output_format, highlight_code, highlight_auto, highlight_cache
+        )
+        return converter
+
+
+@cached_function
+def highlight_cache(cache_dir, max_size):
+    from simpleblog.caching import BlogRenderCache
+    return BlogRenderCache(cache_dir, max_size)
+
+
+def highlight_style(style_name):
+    """Return the Pygments style class for ``style_name``.
+    
+    A user-defined custom style module (in the blog's command
+    directory) takes precedence over a built-in style.
+    """
+    from pygments.style import Style
+    from pygments.styles import get_style_by_name
+    
+    try:
+        mod = import_module(style_name)
+    except ImportError:
+        mdstyle = None
+    else:
+        mdstyle = first_subclass(mod, Style)
+    return mdstyle or get_style_by_name(style_name)
+
+
+def highlight_css(style_name, command_dir="", cache=None):
+    """Return the stylesheet for highlighting style ``style_name``.
+    
+    The stylesheet is kept in ``cache`` (a ``BlogRenderCache``), if it
+    is given, under the style name, the Pygments version, and (for a
+    custom style) the stamp of the style's module, so Pygments is only
+    needed to generate it when one of those changes.
+    """
+    with tmp_sys_path(command_dir):
+        try:
+            spec = find_spec(style_name)
+        except (ImportError, ValueError):
+            spec = None
+        if cache is not None:
+            key = cache.make_key(style_name, dict(
+                highlight_css=True,
+                pygments_version=pygments_version(),
+                style_stamp=file_stamp(spec.origin) if spec and spec.origin else None
+            ))
+            css = cache.get(key)
+            if css is not None:
+                return css
+        from pygments.formatters import HtmlFormatter
+        
+        # Generate CSS with selector for markdown codehilite extension
+        css = HtmlFormatter(style=highlight_style(style_name)).get_style_defs(arg=".codehilite")
+    if not css.endswith(os.linesep):
+        css = "{}{}".format(css, os.linesep)
+    if cache is not None:
+        cache.put(key, css)
+    return css
+
+
+# Folded entries are converted in one pass, with this sentinel at the fold,
+# when that gives the same output as converting the parts separately: the
+# fold must be at a block boundary, and the rest of the entry must not
+# continue a block from before it (by being indented) or define reference
+# links that the part before it could use
+
+fold_sentinel = "<!-- simpleblog:fold -->"
+
+# The sentinel's line in the rendered output, whatever its line endings;
+# the line ending before it is kept to rejoin the parts around it
+
+fold_split = re.compile(r'(\r?\n){}(?:\r?\n)+'.format(re.escape(fold_sentinel)))
+
+reference_definition = re.compile(r'^ {0,3}\[[^\]]+\]:', re.MULTILINE)
+
+
 class BaseFormatter(object):
     """Do-nothing formatter to serve as default.
     """
@@ -69,30 +343,95 @@ class PrettyPrinter(BaseFormatter):
 class MarkdownEntryMixin(EntryMixin):
     
     config_vars = dict(
+        backend=('markdown_backend', reference_backend),
         output_format=('markdown_format', "html4"),
         highlight_code=('markdown_highlight', False),
         highlight_auto=('markdown_highlight_auto', False),
+        highlight_cache_dir=('markdown_highlight_cache_dir', ""),
         pretty_print=('markdown_pretty', False)
     )
     
+    evict_names = ('converter', 'formatter')
+    
+    @shared_property
+    def backend_name(self):
+        return select_backend(self.backend)
+    
     @extendable_property()
     def converter(self):
-        kwargs = dict(
-            output_format=self.output_format
+        return self.backend_converter(self.backend_name)
+    
+    def backend_converter(self, backend):
+        return shared_converter(
+            backend, self.output_format, self.highlight_code, self.highlight_auto,
+            self.highlight_cache
         )
-        if self.highlight_code:
-            kwargs.update(
-                extensions=['codehilite(guess_lang={})'.format(self.highlight_auto)]
-            )
-        return Markdown(**kwargs)
+    
+    @shared_property
+    def highlight_cache(self):
+        """Return the cache for highlighted code blocks, or None.
+        
+        Highlighted blocks go in the render cache directory, unless a
+        separate directory is set; the same size limit applies.
+        """
+        cache_dir = self.highlight_cache_dir or self.render_cache_dir
+        if self.highlight_code and cache_dir:
+            return highlight_cache(cache_dir, self.render_cache_max_size)
+        return None
     
     @extendable_property()
     def formatter(self):
         return PrettyPrinter() if self.pretty_print else BaseFormatter()
     
+    @shared_property
+    def markdown_render_config(self):
+        return dict(
+            markdown_backend=self.backend_name,
+            markdown_version=markdown_backends[self.backend_name].version(),
+            markdown_format=self.output_format,
+            markdown_highlight=self.highlight_code,
+            markdown_highlight_auto=self.highlight_auto,
+            markdown_pretty=self.pretty_print
+        )
+    
+    def convert(self, rawdata, converter=None):
+        if converter is None:
+            converter = self.converter
+        try:
+            return converter.convert(rawdata)
+        finally:
+            # Converters are shared, so state from this document (such as
+            # reference links) must not leak into the next one
+            converter.reset()
+    
     def _do_render(self, rawdata):
-        html = self.converter.convert(rawdata)
-        return self.formatter.format(html)
+        return self.formatter.format(self.convert(rawdata))
+    
+    def render_with(self, backend, rawdata):
+        """Render ``rawdata`` with the named backend.
+        
+        This bypasses the render cache and the entry's own converter, so
+        backends can be compared (see the ``check-markdown`` command).
+        """
+        return self.formatter.format(self.convert(rawdata, self.backend_converter(backend)))
+    
+    def _do_render_split(self, head, tail):
+        if (
+            head.strip() and head.endswith(newline * 2) and
+            tail and not tail[0].isspace() and
+            not reference_definition.search(tail)
+        ):
+            html = self.convert("".join((head, fold_sentinel, newline * 2, tail)))
+            # Raw HTML blocks are followed by an extra blank line, which
+            # the split drops along with the sentinel
+            parts = fold_split.split(html)
+            if len(parts) == 3:
+                short, linesep, rest = parts
+                return (
+                    self.formatter.format(short),
+                    self.formatter.format(linesep.join((short, rest)))
+                )
+        return super(MarkdownEntryMixin, self)._do_render_split(head, tail)
 
 
 class MarkdownExtension(BlogExtension):
@@ -103,29 +442,19 @@ class MarkdownExtension(BlogExtension):
         markdown_highlight_style=None
     )
     
-    def blog_mod_render_items(self, blog, items):
+    def entry_mod_render_config(self, entry, config):
+        config.update(entry.markdown_render_config)
+        return config
+    
+    def blog_mod_extra_render_items(self, blog, items):
         if self.markdown_highlight_style:
-            from pygments.style import Style
-            from pygments.styles import get_style_by_name
-            from pygments.formatters import HtmlFormatter
-            
-            # User-defined custom style takes precedence
-            try:
-                with tmp_sys_path(self.config.get('command_dir', "")):
-                    mod = import_module(self.markdown_highlight_style)
-            except ImportError:
-                mdstyle = None
-            else:
-                mdstyle = first_subclass(mod, Style)
-            
-            # Try for built-in style if no custom style
-            if not mdstyle:
-                mdstyle = get_style_by_name(self.markdown_highlight_style)
-            
-            # Generate CSS with selector for markdown codehilite extension
-            css = HtmlFormatter(style=mdstyle).get_style_defs(arg=".codehilite")
-            if not css.endswith(os.linesep):
-                css = "{}{}".format(css, os.linesep)
+            # Entries share one highlight cache, so use theirs if there is one
+            entries = blog.all_entries
+            css = highlight_css(
+                self.markdown_highlight_style,
+                self.config.get('command_dir', ""),
+                entries[0].highlight_cache if entries else None
+            )
             csspath = blog.metadata['highlight_stylesheet_url']
             if csspath.startswith('/'):
                 csspath = csspath[1:]
@@ -8,10 +8,12 @@ Released under the GNU General Public License, Version 2
 See the LICENSE and README files for more information
 """
 
+import sys
+
 from plib.stdlib.strings import split_string
 
 from simpleblog import extendable_property, newline
-from simpleblog.caching import cached
+from simpleblog.caching import cached, get_cache
 from simpleblog.extensions import BlogExtension, EntryMixin, NamedEntries
 
 
@@ -37,7 +39,8 @@ class Tagset(object):
     """
     
     def __init__(self, s):
-        self._tags = frozenset(t.strip() for t in s.split(','))
+        # Tag names are shared by many entries, so intern them
+        self._tags = frozenset(sys.intern(t.strip()) for t in s.split(','))
     
     def __str__(self):
         return ','.join(sorted(self._tags))
@@ -65,10 +68,10 @@ class BlogTag(NamedEntries):
     typename = "Tag"
     sourcetype_attrname = 'all_tags'
     
+    presorted = True
+    
     def _get_entries(self):
-        return [
-            e for e in self.blog.all_entries if self.name in e.tags
-        ]
+        return self.blog.tag_entries.get(self.name, ())
 
 
 class TagsEntryMixin(EntryMixin):
@@ -78,6 +81,8 @@ class TagsEntryMixin(EntryMixin):
         tags_end=newline
     )
     
+    evict_names = ('_tagstr',)
+    
     def _do_load(self):
         raw = super(TagsEntryMixin, self)._do_load()
         pre, mid, post = split_string(
@@ -91,7 +96,7 @@ class TagsEntryMixin(EntryMixin):
         return raw
     
     @extendable_property(
-        cached(tags_file, objtype=Tagset)
+        cached(tags_file, objtype=Tagset, validate=True, members=True)
     )
     def tags(self):
         self.load()
@@ -107,10 +112,11 @@ class TagsExtension(BlogExtension):
     )
     
     def entry_post_init(self, entry):
+        # Many entries have the same tags, so share their links
         entry.metadata.update(
-            taglinks=',{}'.format(newline).join(
+            taglinks=sys.intern(',{}'.format(newline).join(
                 makelink(tag, self.tags_prefix) for tag in sorted(entry.tags)
-            )
+            ))
         )
     
     def entry_mod_attrs(self, entry, attrs, format, params):
@@ -121,11 +127,16 @@ class TagsExtension(BlogExtension):
     
     def blog_mod_sources(self, blog, sources):
         
-        blog.tag_names = set(
-            tag
-            for entry in blog.all_entries
-            for tag in entry.tags
-        )
+        # Every entry's tags were looked up when the entry was created
+        # (see entry_post_init), so the tags cache is current, and the
+        # entries with each tag can be queried from it
+        cache = get_cache(blog, tags_file)
+        blog.tag_entries = {}
+        for tagname in cache.all_members():
+            entries = blog.entries_with_keys(cache.keys_with(tagname))
+            if entries:
+                blog.tag_entries[tagname] = entries
+        blog.tag_names = set(blog.tag_entries)
         
         blog.all_tags = [
             BlogTag(blog, tagname)
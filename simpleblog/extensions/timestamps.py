@@ -10,9 +10,11 @@ See the LICENSE and README files for more information
 
 from datetime import datetime
 
+from plib.stdlib.decotools import cached_property
+
 from simpleblog import extendable_property, extendable_method
-from simpleblog.caching import cached
-from simpleblog.extensions import BlogExtension, EntryMixin
+from simpleblog.caching import cached, get_cache
+from simpleblog.extensions import BlogExtension, BlogMixin, EntryMixin
 
 
 timestamps_file = BlogExtension.config.get('timestamps_file', "timestamps")
@@ -20,6 +22,16 @@ timestamps_file = BlogExtension.config.get('timestamps_file', "timestamps")
 timestamp_cache_format = "%Y-%m-%d %H:%M"
 
 
+def cached_datetime(s):
+    """Return the date and time that cached timestamp string ``s`` starts with.
+    
+    Extensions can add to the string (the ``timezone`` extension adds
+    the time zone), but it always starts with the date and time in
+    ``timestamp_cache_format``.
+    """
+    return datetime.strptime(" ".join(s.split(" ", 2)[:2]), timestamp_cache_format)
+
+
 class TimestampEntryMixin(EntryMixin):
     
     @extendable_method()
@@ -27,7 +39,7 @@ class TimestampEntryMixin(EntryMixin):
         return dt.strftime(fmt)
     
     @extendable_property(
-        cached(timestamps_file, reverse=True)
+        cached(timestamps_file, reverse=True, timestamp=cached_datetime)
     )
     def timestamp_str(self):
         dt = self.datetime_from_mtime(self.mtime)
@@ -38,6 +50,26 @@ class TimestampEntryMixin(EntryMixin):
         return datetime.strptime(s, fmt)
 
 
+class TimestampsBlogMixin(BlogMixin):
+    
+    @cached_property
+    def timestamps_cache(self):
+        # Looking up every entry's timestamp makes sure the cache has
+        # them all before it is queried (sorting entries by timestamp
+        # normally has done this already)
+        for entry in self.all_entries:
+            entry.timestamp_str
+        return get_cache(self, timestamps_file)
+    
+    def entries_between(self, start, end):
+        """Return the entries with timestamps from ``start`` up to ``end``.
+        
+        The entries at ``end`` are not included, and the entries are in
+        master order; the cached timestamps are queried for them.
+        """
+        return self.entries_with_keys(self.timestamps_cache.keys_between(start, end))
+
+
 class TimestampsExtension(BlogExtension):
     """Cache entry timestamps.
     """
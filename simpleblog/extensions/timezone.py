@@ -10,10 +10,6 @@ See the LICENSE and README files for more information
 
 from datetime import datetime, timedelta
 
-import pytz
-
-from plib.stdlib.tztools import local_tzname
-
 from simpleblog import extendable_property
 from simpleblog.extensions import BlogExtension, EntryMixin
 
@@ -29,10 +25,14 @@ class TimezoneEntryMixin(EntryMixin):
     
     @extendable_property()
     def timezone_tzname(self):
-        return self._tzname or self.timezone_name or ("UTC" if self.utc_timestamps else local_tzname())
+        if not (self._tzname or self.timezone_name or self.utc_timestamps):
+            from plib.stdlib.tztools import local_tzname
+            return local_tzname()
+        return self._tzname or self.timezone_name or "UTC"
     
     @extendable_property()
     def timezone(self):
+        import pytz
         return pytz.timezone(self.timezone_tzname)
 
 
@@ -56,6 +56,7 @@ class TimezoneExtension(BlogExtension):
     )
     
     def entry_get_datetime_from_mtime(self, entry, mtime):
+        import pytz
         dt_naive = datetime.utcfromtimestamp(entry.mtime)
         # Can't use datetime constructor with pytz tzinfo object, per pytz docs
         # (UTC is supposed to work OK, but we'll take no chances), so we build
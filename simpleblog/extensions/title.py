@@ -27,6 +27,8 @@ class TitleEntryMixin(EntryMixin):
         title_format=False
     )
     
+    evict_names = ('_titlestr',)
+    
     def _do_load(self):
         raw = super(TitleEntryMixin, self)._do_load()
         if self.title_separator in raw:
@@ -49,7 +51,7 @@ class TitleEntryMixin(EntryMixin):
         return self._titlestr
     
     @extendable_property(
-        cached(titles_file)
+        cached(titles_file, validate=True)
     )
     def title(self):
         self.load()
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Module GRAPH -- Simple Blog Graph Snapshot
+Package SIMPLEBLOG
+Copyright (C) 2012-2013 by Peter A. Donis
+
+Released under the GNU General Public License, Version 2
+See the LICENSE and README files for more information
+"""
+
+import os
+import json
+
+from plib.stdlib.decotools import cached_property
+
+from simpleblog import BlogObject, file_stamp, value_stamp
+from simpleblog.caching import cache_store_stamps
+
+
+# Environment variables that can change how the blog is rendered (e.g.,
+# localized month names), so they are part of the fingerprint
+
+environ_keys = ('LANG', 'LC_ALL', 'LC_TIME', 'TZ')
+
+
+class BlogGraph(BlogObject):
+    """Persisted snapshot of the derived blog graph.
+    
+    The snapshot is keyed by a fingerprint of everything the blog is
+    derived from: the config (including the extension list), the blog
+    metadata file, the entry and template files, the entry metadata
+    caches, and the locale environment. It records the fully derived
+    blog metadata (including values extensions compute, such as the
+    copyright notice and tag and archive links) and the stamps of the
+    files the last ``render-static`` run wrote (by their paths relative
+    to the static directory, so a blog that is copied or moved checks
+    its own files). If the fingerprint has not changed, the blog
+    metadata is taken from the snapshot instead of derived, and if the
+    written files have not changed either, there is nothing to render
+    at all.
+    
+    This is not a full warm start: only the blog metadata and the
+    output stamps are stored. Entries, container memberships, and
+    navigation are not, so if anything has to be rendered, they are
+    derived as usual.
+    """
+    
+    config_vars = dict(
+        graph_file="graph",
+        static_dir="static"
+    )
+    
+    def __init__(self, blog):
+        BlogObject.__init__(self, blog)
+        self.source_stamp = value_stamp(sorted(self.source_inputs())) if self.graph_file else None
+    
+    @cached_property
+    def cache_dir(self):
+        return self.config.get('cache_dir', self.entries_dir)
+    
+    @cached_property
+    def filename(self):
+        return os.path.join(self.cache_dir, self.graph_file)
+    
+    def source_inputs(self):
+        """Yield (name, stamp) tuples for the inputs the blog is derived from.
+        """
+        blog = self.blog
+        yield ("config", blog.config_stamp)
+        yield ("extensions", value_stamp(tuple(self.config.get("extensions", ()))))
+        yield ("metadata", value_stamp(sorted(blog.blogfile_metadata.items())))
+        yield ("environ", value_stamp([os.environ.get(key) for key in environ_keys]))
+        yield ("static_dir", value_stamp(self.static_dir))
+        for filename, st in blog.snapshot.stats.items():
+            yield ("entry:{}".format(filename), file_stamp(filename, st))
+        if os.path.isdir(self.template_dir):
+            with os.scandir(self.template_dir) as it:
+                for item in it:
+                    if item.is_file():
+                        yield ("template:{}".format(item.name), file_stamp(item.path, item.stat()))
+    
+    def fingerprint(self):
+        # Caches are saved during a command, after the source stamp is
+        # taken, so their stamps have to be checked when they are used
+        return value_stamp((self.source_stamp, cache_store_stamps(self.blog)))
+    
+    @cached_property
+    def data(self):
+        if self.source_stamp is None:
+            return {}
+        try:
+            with open(self.filename, 'r') as f:
+                data = json.load(f)
+        except (IOError, ValueError):
+            return {}
+        if data.get('fingerprint') != self.fingerprint():
+            return {}
+        return data
+    
+    @property
+    def metadata(self):
+        """Return the derived blog metadata, or None if it has to be derived.
+        """
+        return self.data.get('metadata')
+    
+    def static_path(self, path):
+        return os.path.abspath(os.path.join(self.static_dir, path))
+    
+    @property
+    def outputs(self):
+        return [self.static_path(path) for path, stamp in self.data.get('outputs', ())]
+    
+    def outputs_unchanged(self):
+        """Return whether the files written by the last render are unchanged.
+        """
+        outputs = self.data.get('outputs')
+        return bool(outputs) and all(
+            file_stamp(self.static_path(path)) == stamp for path, stamp in outputs
+        )
+    
+    def save(self, paths):
+        """Save the snapshot, with the current stamps of the files in ``paths``.
+        
+        The paths are stored relative to the static directory.
+        
+        All entry metadata caches must be saved first, since their stamps
+        are part of the fingerprint. The snapshot is not saved if the blog
+        metadata can't be stored in it exactly.
+        """
+        if self.source_stamp is None:
+            return
+        metadata = self.blog.metadata
+        try:
+            if json.loads(json.dumps(metadata)) != metadata:
+                return
+        except (TypeError, ValueError):
+            return
+        data = dict(
+            fingerprint=self.fingerprint(),
+            metadata=metadata,
+            outputs=[
+                (os.path.relpath(path, self.static_path("")), file_stamp(path))
+                for path in paths
+            ]
+        )
+        # Write to a temporary file and rename it so an interrupted
+        # build never leaves a truncated snapshot behind
+        tmpname = "{}.tmp".format(self.filename)
+        with open(tmpname, 'w') as f:
+            json.dump(data, f, sort_keys=True)
+        os.replace(tmpname, self.filename)
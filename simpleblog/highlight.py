@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Module HIGHLIGHT -- Simple Blog Cached Code Highlighting
+Package SIMPLEBLOG
+Copyright (C) 2012-2013 by Peter A. Donis
+
+Released under the GNU General Public License, Version 2
+See the LICENSE and README files for more information
+
+This module imports Markdown and Pygments, so it should only be
+imported when code is actually highlighted (the ``render-markdown``
+extension does this when it builds a converter).
+"""
+
+import re
+from html import unescape
+
+from markdown.extensions.codehilite import (
+    CodeHilite, CodeHiliteExtension, HiliteTreeprocessor)
+
+from simpleblog.extensions.render_markdown import markdown_version, pygments_version
+
+
+# Code blocks as Markdown engines output them, with the language (if the
+# engine supports fenced blocks) in the class attribute
+
+code_block = re.compile(
+    r'<pre><code(?: class="(?:language-)?([^"]*)")?>(.*?)</code></pre>', re.DOTALL)
+
+
+class BlockHighlighter(object):
+    """Highlight code blocks the same way as the codehilite extension.
+    
+    If ``cache`` (a ``BlogRenderCache``) is given, each block is looked
+    up in it first. Blocks are cached by their text (including any
+    language header) and everything else that determines the highlighted
+    HTML: the codehilite settings in ``config`` (language guessing, style,
+    and so on), the tab length, and the Markdown and Pygments versions.
+    """
+    
+    def __init__(self, config, tab_length, cache=None):
+        self.config = config
+        self.tab_length = tab_length
+        self.cache = cache
+    
+    def hilite(self, src):
+        config = self.config
+        cache = self.cache
+        if cache is not None:
+            key = cache.make_key(src, dict(
+                config,
+                highlight_block=True,
+                tab_length=self.tab_length,
+                markdown_version=markdown_version(),
+                pygments_version=pygments_version()
+            ))
+            html = cache.get(key)
+            if html is not None:
+                return html
+        code = CodeHilite(
+            src,
+            linenums=config['linenums'],
+            guess_lang=config['guess_lang'],
+            css_class=config['css_class'],
+            style=config['pygments_style'],
+            noclasses=config['noclasses'],
+            tab_length=self.tab_length,
+            use_pygments=config['use_pygments']
+        )
+        html = code.hilite()
+        if cache is not None:
+            cache.put(key, html)
+        return html
+    
+    def highlight_html(self, html):
+        """Highlight the code blocks in ``html`` from another Markdown engine.
+        """
+        
+        def highlight(match):
+            lang, src = match.groups()
+            src = unescape(src)
+            if lang:
+                src = ":::{}\n{}".format(lang, src)
+            # Python-Markdown puts a blank line after each highlighted
+            # block, since it inserts them as raw HTML blocks
+            return "{}\n\n".format(self.hilite(src).rstrip("\n"))
+        
+        return code_block.sub(highlight, html)
+
+
+def block_highlighter(guess_lang, cache=None, tab_length=4):
+    """Return highlighter with the default codehilite settings.
+    """
+    return BlockHighlighter(
+        CodeHiliteExtension(guess_lang=guess_lang).getConfigs(), tab_length, cache
+    )
+
+
+class CachedHiliteTreeprocessor(HiliteTreeprocessor):
+    """Highlight code blocks with a ``BlockHighlighter``.
+    """
+    
+    highlighter = None
+    
+    def run(self, root):
+        for block in root.iter('pre'):
+            if len(block) == 1 and block[0].tag == 'code':
+                placeholder = self.markdown.htmlStash.store(
+                    self.highlighter.hilite(block[0].text), safe=True
+                )
+                # Same as the codehilite extension: the block becomes a
+                # paragraph that is removed when the raw HTML is inserted
+                block.clear()
+                block.tag = 'p'
+                block.text = placeholder
+
+
+class CachedCodeHiliteExtension(CodeHiliteExtension):
+    """The codehilite Markdown extension, with highlighted blocks cached.
+    
+    The cache is a ``BlogRenderCache`` (or None to not cache), so it
+    persists across runs.
+    """
+    
+    def __init__(self, cache=None, **kwargs):
+        self.cache = cache
+        super(CachedCodeHiliteExtension, self).__init__(**kwargs)
+    
+    def extendMarkdown(self, md, md_globals):
+        hiliter = CachedHiliteTreeprocessor(md)
+        hiliter.config = self.getConfigs()
+        hiliter.highlighter = BlockHighlighter(hiliter.config, md.tab_length, self.cache)
+        md.treeprocessors.add("hilite", hiliter, "<inline")
+        
+        md.registerExtension(self)
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Module PIPELINE -- Simple Blog Streaming Render Pipeline
+Package SIMPLEBLOG
+Copyright (C) 2012-2013 by Peter A. Donis
+
+Released under the GNU General Public License, Version 2
+See the LICENSE and README files for more information
+
+Rendering is broken up into stages, each of which is a generator
+that takes the output of the previous stage. Since the stages are
+chained lazily, only one page is in flight at a time: each page's
+data is written, and its cached render results released, before the
+next page is produced, so memory use does not grow with the number
+of pages in the blog.
+
+Entries can appear on many pages, and keep their loaded, rendered, and
+formatted data for reuse while any page that shows them remains to be
+written; an ``EntryTracker`` evicts that data after the last such page
+is written, and can also keep the total within a memory budget.
+"""
+
+from collections import Counter, OrderedDict
+from itertools import chain
+
+from simpleblog import extension_handlers
+from simpleblog.trace import span
+
+
+class EntryTracker(object):
+    """Evict cached entry data when no more pages need it.
+    
+    The number of pages in ``pages`` that show each entry is counted up
+    front, and each entry's cached data is evicted after the last of
+    those pages has been written. If ``budget`` is not None, it limits
+    the approximate total size in bytes of the data kept for entries
+    that later pages still need; when it is exceeded, the least recently
+    used entries are evicted, and will load and render again if a later
+    page shows them. A budget of zero keeps no entry data beyond the
+    page being rendered.
+    """
+    
+    def __init__(self, pages, budget=None):
+        self.counts = Counter(
+            entry for page in pages for entry in page.entries or ()
+        )
+        self.budget = budget
+        self.sizes = OrderedDict()
+        self.total = 0
+    
+    def page_done(self, page):
+        counts = self.counts
+        sizes = self.sizes
+        for entry in page.entries or ():
+            self.total -= sizes.pop(entry, 0)
+            counts[entry] -= 1
+            if counts[entry] > 0:
+                sizes[entry] = entry.cached_size
+                self.total += entry.cached_size
+            else:
+                entry.evict()
+        if self.budget is not None:
+            while sizes and (self.total > self.budget):
+                entry, size = sizes.popitem(last=False)
+                self.total -= size
+                entry.evict()
+
+
+def discover_stage(blog):
+    """Yield the pages to be rendered.
+    """
+    for page in blog.render_pages:
+        yield page
+
+
+def load_stage(pages):
+    """Load the raw data of the entries in each page.
+    """
+    for page in pages:
+        for entry in page.entries or ():
+            entry.load()
+        yield page
+
+
+def render_stage(pages):
+    """Render the entries in each page into the page body.
+    """
+    for page in pages:
+        page.body
+        yield page
+
+
+def format_stage(pages):
+    """Fill in the page template for each page.
+    """
+    for page in pages:
+        page.formatted
+        yield page
+
+
+def encode_stage(pages, tracker=None):
+    """Yield encoded data and file path for each page.
+    """
+    for page in pages:
+        yield page.encoded, page.filepath
+        # By the time the next page is asked for, the consumer is
+        # done with this one, so its render results can be dropped
+        page.release()
+        if tracker is not None:
+            tracker.page_done(page)
+
+
+def write_stage(items, write):
+    """Pass each encoded item to ``write`` and yield the results.
+    """
+    for data, path in items:
+        with span("write", path):
+            result = write(data, path)
+        yield result
+
+
+def page_items(pages, tracker=None):
+    """Chain the stages that turn pages into encoded items.
+    """
+    return encode_stage(format_stage(render_stage(load_stage(pages))), tracker)
+
+
+def render_items_hooked():
+    """Return whether any extension hooks the blog's ``render_items``.
+    
+    Extensions written before the pipeline existed may get or modify
+    ``render_items``, which holds the encoded data of every page; to
+    give their hooks the real items, pages are then rendered all at
+    once instead of streamed.
+    """
+    return any(
+        extension_handlers.get(('blog', key))
+        for key in ('blog_get_render_items', 'blog_mod_render_items')
+    )
+
+
+def render_pipeline(blog, write, budget=None):
+    """Render and write all pages and extra items in ``blog``.
+    
+    The ``budget`` argument is passed to the ``EntryTracker`` that
+    evicts cached entry data as pages are written. If extensions hook
+    ``render_items``, the blog's ``render_items`` are written instead,
+    and no entry data is evicted until all pages are rendered.
+    """
+    if render_items_hooked():
+        return write_stage(blog.render_items, write)
+    tracker = EntryTracker(blog.render_pages, budget)
+    return write_stage(
+        chain(page_items(discover_stage(blog), tracker), blog.extra_render_items),
+        write
+    )
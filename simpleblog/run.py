@@ -10,9 +10,11 @@ See the LICENSE and README files for more information
 
 from plib.stdlib.options import prepare_specs, update_parser, invoke_parser
 
-from simpleblog import BlogError, load_blog
+from simpleblog import BlogError, load_config, load_blog
+from simpleblog.caching import save_caches
 from simpleblog.commands import BlogCommand
 from simpleblog.sub import load_sub
+from simpleblog.trace import span, start_tracing, save_trace
 
 
 class BlogCommandError(BlogError):
@@ -20,13 +22,24 @@ class BlogCommandError(BlogError):
 
 
 def run(cmdname, parser, opts, goptlist, result=None, remaining=None):
-    config, blog = load_blog(opts)
+    if opts.trace:
+        start_tracing()
+    try:
+        run_command(cmdname, parser, opts, goptlist, result, remaining)
+    finally:
+        if opts.trace:
+            save_trace(opts.trace, opts.trace_events)
+
+
+def run_command(cmdname, parser, opts, goptlist, result=None, remaining=None):
+    config = load_config(opts)
     
     mod, klass = load_sub(
         cmdname,
         "command", config.get('command_dir', ""),
         BlogCommandError, BlogCommand
     )
+    config, blog = load_blog(opts, config, klass.warm_start)
     
     optlist, arglist = prepare_specs(klass.options or (), klass.arguments or ())
     update_parser(parser, optlist, arglist)
@@ -46,4 +59,9 @@ def run(cmdname, parser, opts, goptlist, result=None, remaining=None):
     
     else:
         cmd = klass(config, opts, args)
-        cmd.run(blog)
+        try:
+            with span("command", cmdname):
+                cmd.run(blog)
+        finally:
+            with span("save_caches"):
+                save_caches()
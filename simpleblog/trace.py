@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Module TRACE -- Simple Blog Build Tracing
+Package SIMPLEBLOG
+Copyright (C) 2012-2013 by Peter A. Donis
+
+Released under the GNU General Public License, Version 2
+See the LICENSE and README files for more information
+
+Tracing is off unless ``start_tracing`` is called (the ``--trace``
+option to the ``simpleblog-run`` script does this). While it is on,
+the main phases of a build are recorded as nested, timed spans, and
+the time spent in each extension hook is totalled; ``save_trace``
+writes the results as JSON, either as a tree of spans or in the
+Chrome trace-event format (which ``chrome://tracing`` and Perfetto
+can display). When tracing is off, the only cost is a check of the
+``tracer`` global in each traced function.
+
+This module must not import anything from the rest of the package,
+since the package itself uses it.
+"""
+
+import os
+import json
+from collections import defaultdict
+from functools import wraps
+from time import perf_counter
+
+
+class BlogTracer(object):
+    """Collect nested timed spans and extension hook totals.
+    
+    Times are in seconds from when the tracer was created.
+    """
+    
+    def __init__(self):
+        self.origin = perf_counter()
+        self.root = dict(name="build", start=0.0, children=[])
+        self.stack = [self.root]
+        self.hooks = defaultdict(lambda: [0, 0.0])
+    
+    def begin(self, name, detail=None):
+        span = dict(name=name, start=perf_counter() - self.origin, children=[])
+        if detail is not None:
+            span['detail'] = detail
+        self.stack[-1]['children'].append(span)
+        self.stack.append(span)
+    
+    def end(self):
+        span = self.stack.pop()
+        span['duration'] = perf_counter() - self.origin - span['start']
+    
+    def finish(self):
+        while len(self.stack) > 1:
+            self.end()
+        self.root['duration'] = perf_counter() - self.origin
+    
+    def hook_totals(self):
+        return dict(
+            (name, dict(calls=calls, seconds=seconds))
+            for name, (calls, seconds) in self.hooks.items()
+        )
+    
+    def events(self, span, pid):
+        """Yield Chrome trace events for ``span`` and its children.
+        """
+        event = dict(
+            name=span['name'], ph="X", pid=pid, tid=0,
+            ts=span['start'] * 1e6, dur=span['duration'] * 1e6
+        )
+        if 'detail' in span:
+            event['args'] = dict(detail=span['detail'])
+        yield event
+        for child in span['children']:
+            for event in self.events(child, pid):
+                yield event
+    
+    def data(self, chrome=False):
+        self.finish()
+        if chrome:
+            return dict(
+                traceEvents=list(self.events(self.root, os.getpid())),
+                displayTimeUnit="ms",
+                otherData=dict(hooks=self.hook_totals())
+            )
+        return dict(spans=self.root, hooks=self.hook_totals())
+
+
+tracer = None
+
+
+def start_tracing():
+    global tracer
+    tracer = BlogTracer()
+
+
+def save_trace(filename, chrome=False):
+    """Write the trace to ``filename`` and stop tracing.
+    """
+    global tracer
+    if tracer is None:
+        return
+    data = tracer.data(chrome)
+    tracer = None
+    with open(filename, 'w') as f:
+        json.dump(data, f, indent=1)
+
+
+class span(object):
+    """Context manager that records a span while tracing is on.
+    """
+    
+    def __init__(self, name, detail=None):
+        self.name = name
+        self.detail = detail
+        self.tracer = tracer
+    
+    def __enter__(self):
+        if self.tracer is not None:
+            self.tracer.begin(self.name, self.detail)
+        return self
+    
+    def __exit__(self, *exc_info):
+        if self.tracer is not None:
+            self.tracer.end()
+
+
+def traced(name, detail=None):
+    """Decorator that records a span for each call while tracing is on.
+    
+    If ``detail`` is given, it is called with the function's first
+    argument (usually ``self``) to give a description of the span,
+    such as the path of the page being formatted.
+    """
+    
+    def decorator(f):
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            if tracer is None:
+                return f(*args, **kwargs)
+            tracer.begin(name, detail(args[0]) if detail else None)
+            try:
+                return f(*args, **kwargs)
+            finally:
+                tracer.end()
+        return wrapper
+    
+    return decorator
+
+
+def traced_hook(name, hook, as_span=False):
+    """Wrap extension ``hook`` so the time spent in it is totalled.
+    
+    Hook times include any nested work the hook causes (such as other
+    hooks). If ``as_span`` is true, each call is also recorded as a span.
+    """
+    
+    @wraps(hook)
+    def wrapper(*args, **kwargs):
+        if tracer is None:
+            return hook(*args, **kwargs)
+        t = perf_counter()
+        if as_span:
+            tracer.begin(name)
+        try:
+            return hook(*args, **kwargs)
+        finally:
+            if as_span:
+                tracer.end()
+            totals = tracer.hooks[name]
+            totals[0] += 1
+            totals[1] += perf_counter() - t
+    
+    return wrapper
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Sub-Package TESTS
+Copyright (C) 2012-2013 by Peter A. Donis
+
+Released under the GNU General Public License, Version 2
+See the LICENSE and README files for more information
+"""
+
+import os
+import sys
+import json
+import shutil
+import tempfile
+import subprocess
+import unittest
+
+
+package_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+script = os.path.join(package_dir, "scripts", "simpleblog3-run")
+
+
+class BlogTestCase(unittest.TestCase):
+    """Test case that runs commands on a copy of an example blog.
+    """
+    
+    example = "bare"
+    
+    # If this is set, a synthetic blog with this many entries (made by
+    # the bench module's generator) is used instead of the example blog
+    synthetic_entries = 0
+    synthetic_options = {}
+    
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp(prefix="simpleblog-test-")
+        if self.synthetic_entries:
+            from simpleblog.bench import generate_blog
+            self.blogdir = os.path.join(self.tempdir, "synthetic")
+            self.changed_entry = generate_blog(
+                self.blogdir, self.synthetic_entries, **self.synthetic_options
+            )
+        else:
+            self.blogdir = os.path.join(self.tempdir, self.example)
+            shutil.copytree(os.path.join(package_dir, "examples", self.example), self.blogdir)
+            shutil.rmtree(os.path.join(self.blogdir, "static"), ignore_errors=True)
+    
+    def tearDown(self):
+        shutil.rmtree(self.tempdir, ignore_errors=True)
+    
+    def blog_path(self, *names):
+        return os.path.join(self.blogdir, *names)
+    
+    def write_file(self, name, data):
+        with open(self.blog_path(name), 'w') as f:
+            f.write(data)
+    
+    def read_file(self, name):
+        with open(self.blog_path(name), 'r') as f:
+            return f.read()
+    
+    def update_config(self, **kwargs):
+        # Synthetic blogs keep their config as JSON
+        config = json.loads(self.read_file("config.json"))
+        config.update(kwargs)
+        self.write_file("config.json", json.dumps(config))
+    
+    def run_command(self, *args, environ=None, returncode=0):
+        return self.run_python(script, *args, environ=environ, returncode=returncode)
+    
+    def run_python(self, *args, environ=None, returncode=0):
+        # Loading a blog changes module-level state (such as the loaded
+        # extensions), so blogs are only loaded in separate processes
+        env = dict(os.environ, **(environ or {}))
+        env['PYTHONPATH'] = os.pathsep.join(
+            [package_dir] + [path for path in env.get('PYTHONPATH', "").split(os.pathsep) if path]
+        )
+        proc = subprocess.run(
+            [sys.executable] + list(args),
+            cwd=self.blogdir, env=env,
+            stdout=subprocess.PIPE, stderr=subprocess.STDOUT, universal_newlines=True
+        )
+        self.assertEqual(proc.returncode, returncode, proc.stdout)
+        return proc.stdout
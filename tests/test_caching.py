@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Module TEST_CACHING -- Tests for the entry metadata caches
+Sub-Package TESTS
+Copyright (C) 2012-2013 by Peter A. Donis
+
+Released under the GNU General Public License, Version 2
+See the LICENSE and README files for more information
+"""
+
+import os
+import glob
+import json
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from datetime import datetime
+
+from simpleblog import BlogConfig
+from simpleblog.caching import BlogCache, BlogSQLiteCache
+
+from tests import BlogTestCase
+
+
+class Members(object):
+    # Collection values, stored the same way as tag sets
+    
+    def __init__(self, s):
+        self.members = frozenset(s.split(','))
+    
+    def __str__(self):
+        return ','.join(sorted(self.members))
+    
+    def __iter__(self):
+        return iter(self.members)
+
+
+def parse_time(s):
+    return datetime.strptime(s, "%Y-%m-%d %H:%M")
+
+
+class TestBlog(object):
+    # Just what caches need from a blog
+    
+    def __init__(self, cache_dir):
+        filename = os.path.join(cache_dir, "config.json")
+        with open(filename, 'w') as f:
+            json.dump(dict(cache_dir=cache_dir), f)
+        self.config = BlogConfig(filename)
+
+
+class CacheQueryTest(object):
+    
+    klass = None
+    
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp(prefix="simpleblog-test-")
+        self.blog = TestBlog(self.tempdir)
+    
+    def tearDown(self):
+        shutil.rmtree(self.tempdir, ignore_errors=True)
+    
+    def member_cache(self):
+        return self.klass(self.blog, "tags", objtype=Members, members=True)
+    
+    def time_cache(self):
+        return self.klass(self.blog, "timestamps", reverse=True, timestamp=parse_time)
+    
+    def test_keys_with(self):
+        cache = self.member_cache()
+        cache.add("one", Members("a,b"))
+        cache.add("two", Members("b"))
+        cache.add("three", Members("c"))
+        self.assertEqual(cache.keys_with("b"), ["one", "two"])
+        self.assertEqual(cache.keys_with("d"), [])
+        self.assertEqual(cache.all_members(), ["a", "b", "c"])
+        # Replacing a value replaces its members
+        cache.add("one", Members("c"))
+        self.assertEqual(cache.keys_with("b"), ["two"])
+        self.assertEqual(cache.keys_with("c"), ["one", "three"])
+        self.assertEqual(cache.all_members(), ["b", "c"])
+    
+    def test_keys_between(self):
+        cache = self.time_cache()
+        cache.add("new-year", "2020-01-01 00:00")
+        cache.add("late", "2019-12-31 23:59")
+        cache.add("early", "2019-01-01 00:00")
+        cache.add("older", "2018-06-30 12:00")
+        self.assertEqual(
+            cache.keys_between(datetime(2019, 1, 1), datetime(2020, 1, 1)),
+            ["early", "late"]
+        )
+        self.assertEqual(
+            cache.keys_between(datetime(2018, 1, 1), datetime(2021, 1, 1)),
+            ["older", "early", "late", "new-year"]
+        )
+        self.assertEqual(cache.keys_between(datetime(2017, 1, 1), datetime(2018, 1, 1)), [])
+        cache.add("early", "2018-01-01 00:00")
+        self.assertEqual(
+            cache.keys_between(datetime(2019, 1, 1), datetime(2020, 1, 1)),
+            ["late"]
+        )
+    
+    def test_queries_after_save(self):
+        cache = self.member_cache()
+        cache.add("one", Members("a,b"))
+        cache.save()
+        cache = self.time_cache()
+        cache.add("one", "2019-05-01 10:00")
+        cache.save()
+        self.assertEqual(self.member_cache().keys_with("a"), ["one"])
+        self.assertEqual(
+            self.time_cache().keys_between(datetime(2019, 5, 1), datetime(2019, 6, 1)),
+            ["one"]
+        )
+
+
+class TextCacheQueryTest(CacheQueryTest, unittest.TestCase):
+    
+    klass = BlogCache
+
+
+class SQLiteCacheQueryTest(CacheQueryTest, unittest.TestCase):
+    
+    klass = BlogSQLiteCache
+    
+    def test_typed_columns(self):
+        cache = self.time_cache()
+        cache.add("one", "2019-05-01 10:00")
+        cache.save()
+        db = sqlite3.connect(cache.db_filename)
+        self.assertEqual(db.execute(
+            "SELECT typeof(timestamp), timestamp FROM metadata WHERE cachekey = 'one'"
+        ).fetchone(), ("integer", 1556704800))
+        indexes = set(name for name, in db.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index'"
+        ))
+        self.assertTrue({"metadata_timestamp", "members_member"} <= indexes)
+
+
+class FlushingCache(BlogCache):
+    # Config settings are shared by all instances of a class, so this
+    # can't be set in a test blog's config
+    cache_flush_interval = 2
+
+
+class JournalTest(unittest.TestCase):
+    
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp(prefix="simpleblog-test-")
+    
+    def tearDown(self):
+        shutil.rmtree(self.tempdir, ignore_errors=True)
+    
+    def cache(self, klass=BlogCache):
+        return klass(TestBlog(self.tempdir), "titles")
+    
+    def journals(self):
+        return glob.glob(os.path.join(self.tempdir, "titles.journal*"))
+    
+    def read_cache_file(self):
+        with open(os.path.join(self.tempdir, "titles"), 'r') as f:
+            return f.read()
+    
+    def test_items_are_journaled(self):
+        cache = self.cache()
+        cache.add("first", "First Title")
+        cache.add("second", "Second Title")
+        self.assertFalse(os.path.exists(os.path.join(self.tempdir, "titles")))
+        self.assertEqual(len(self.journals()), 1)
+        # An interrupted build's items are read back from its journal
+        self.assertEqual(self.cache().get("second"), "Second Title")
+    
+    def test_save_compacts_all_journals(self):
+        cache = self.cache()
+        cache.add("first", "First Title")
+        # As a worker process would leave it
+        with open(os.path.join(self.tempdir, "titles.journal.0"), 'w') as f:
+            f.write(cache.format_line("second", "Second Title"))
+        cache.save()
+        self.assertEqual(self.journals(), [])
+        self.assertEqual(self.read_cache_file(), "first First Title\nsecond Second Title\n")
+        self.assertFalse(cache.needs_save)
+    
+    def test_flush_interval(self):
+        cache = self.cache(FlushingCache)
+        cache.add("first", "First Title")
+        self.assertEqual(len(self.journals()), 1)
+        cache.add("second", "Second Title")
+        self.assertEqual(self.journals(), [])
+        self.assertEqual(self.read_cache_file(), "first First Title\nsecond Second Title\n")
+
+
+class CacheStoreTest(BlogTestCase):
+    
+    synthetic_entries = 40
+    synthetic_options = dict(tags=1)
+    
+    def render(self, **config):
+        self.update_config(**config)
+        shutil.rmtree(self.blog_path("static"), ignore_errors=True)
+        self.run_command("render-static", "-q")
+        return dict(
+            (os.path.relpath(os.path.join(dirpath, name), self.blog_path("static")),
+             self.read_file(os.path.join(dirpath, name)))
+            for dirpath, _, names in os.walk(self.blog_path("static"))
+            for name in names
+        )
+    
+    def test_stores_give_same_output(self):
+        text = self.render()
+        self.assertIn("tag0/index.html", text)
+        self.assertIn("2010/01/index.html", text)
+        self.assertEqual(self.render(cache_store="sqlite"), text)
+        # Again, with everything read from the database
+        self.assertEqual(self.render(cache_store="sqlite"), text)
+    
+    def test_archives_without_timestamp_queries(self):
+        # Without the timestamps extension, archives are built by going
+        # through the entries instead of querying the cache
+        queried = self.render()
+        extensions = json.loads(self.read_file("config.json"))['extensions']
+        scanned = self.render(extensions=[name for name in extensions if name != "timestamps"])
+        for name in queried:
+            if name.startswith("2010/"):
+                self.assertEqual(scanned[name], queried[name], name)
+    
+    def rendered_count(self, *args):
+        from simpleblog.bench import span_names
+        tracefile = os.path.join(self.tempdir, "trace")
+        self.run_command("--trace", tracefile, "render-static", "-q", *args)
+        with open(tracefile, 'r') as f:
+            spans = json.load(f)['spans']
+        return sum(1 for name in span_names(spans) if name == "write")
+    
+    def test_incremental_render_of_changed_entry(self):
+        # Pages depend on the entry's cached values, whose stamp must
+        # not change from run to run when the values don't
+        pages = self.rendered_count("-i")
+        name = os.path.relpath(self.changed_entry, self.blog_path())
+        self.write_file(name, self.read_file(name) + "\nMore text.\n")
+        self.assertLess(self.rendered_count("-i"), pages // 2)
+    
+    def check_changed_tags(self, store):
+        self.render(cache_store=store)
+        name = os.path.relpath(self.changed_entry, self.blog_path())
+        self.write_file(name, self.read_file(name).replace("#tags ", "#tags new-tag,"))
+        output = self.render(cache_store=store)
+        self.assertIn("entry0.html", output["new-tag/index.html"])
+        # Removed entries are not in tag pages, even though the cache
+        # still has their tags
+        os.remove(self.changed_entry)
+        output = self.render(cache_store=store)
+        self.assertNotIn("new-tag/index.html", output)
+        self.assertFalse(any(
+            "entry0.html" in data for name, data in output.items() if name.startswith("tag")
+        ))
+    
+    def test_changed_tags(self):
+        self.check_changed_tags("text")
+    
+    def test_changed_tags_sqlite(self):
+        self.check_changed_tags("sqlite")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Module TEST_DISPATCH -- Tests for the extension dispatch table
+Sub-Package TESTS
+Copyright (C) 2012-2013 by Peter A. Donis
+
+Released under the GNU General Public License, Version 2
+See the LICENSE and README files for more information
+"""
+
+import unittest
+
+from simpleblog import (
+    extension_map, extension_handlers, compile_extensions, check_extensions,
+    noresult)
+
+
+class First(object):
+    
+    def page_get_title(self, page):
+        return "first"
+    
+    def page_mod_title(self, page, title):
+        return title + " first"
+    
+    def page_mod_entry_params(self, page, params, entry):
+        # Written before entry params hooks got the entry's index
+        return params + [entry]
+    
+    def page_helper(self, page):
+        return "not a hook"
+    
+    page_mod_value = "not callable"
+
+
+class Second(object):
+    
+    def page_get_title(self, page):
+        return "second"
+    
+    def page_mod_title(self, page, title):
+        return title + " second"
+    
+    def page_mod_entry_params(self, page, params, entry, index):
+        return params + [index]
+
+
+class DispatchTest(unittest.TestCase):
+    
+    def setUp(self):
+        self.saved = dict((etype, list(exts)) for etype, exts in extension_map.items())
+        extension_map.clear()
+        extension_map['page'].extend([First(), Second()])
+        compile_extensions()
+    
+    def tearDown(self):
+        extension_map.clear()
+        extension_map.update(self.saved)
+        compile_extensions()
+    
+    def test_table_keys(self):
+        self.assertEqual(
+            set(key for etype, key in extension_handlers),
+            set(['page_get_title', 'page_mod_title', 'page_mod_entry_params'])
+        )
+        self.assertEqual(len(extension_handlers[('page', 'page_mod_title')]), 2)
+        self.assertNotIn(('page', 'page_get_body'), extension_handlers)
+    
+    def test_get_hooks_stop_at_first_result(self):
+        self.assertEqual(check_extensions(None, 'page', 'page_get_title'), "first")
+        self.assertIs(check_extensions(None, 'page', 'page_get_body'), noresult)
+    
+    def test_mod_hooks_run_in_load_order(self):
+        self.assertEqual(
+            check_extensions(None, 'page', 'page_mod_title', result="title", modifying=True),
+            "title first second"
+        )
+    
+    def test_legacy_hook_args(self):
+        self.assertEqual(
+            check_extensions(
+                None, 'page', 'page_mod_entry_params', ("entry", 3),
+                result=[], modifying=True
+            ),
+            ["entry", 3]
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Module TEST_ENTRIES -- Tests for the blog entry representation
+Sub-Package TESTS
+Copyright (C) 2012-2013 by Peter A. Donis
+
+Released under the GNU General Public License, Version 2
+See the LICENSE and README files for more information
+"""
+
+import json
+import unittest
+
+from tests import BlogTestCase
+
+
+entry_checks = '''
+import sys, json
+from simpleblog import load_blog
+
+class opts:
+    configfile = "config.json"
+    blogfile = "blog.json"
+
+config, blog = load_blog(opts)
+entries = blog.all_entries
+for entry in entries:
+    entry.load()
+interned = lambda s: sys.intern(str(s)) is s
+print(json.dumps(dict(
+    cachekeys=all(interned(entry.cachekey) for entry in entries),
+    categories=all(interned(entry.category) for entry in entries),
+    tags=all(interned(tag) for entry in entries for tag in entry.tags),
+    source_kept=all('source' in entry.__dict__ for entry in entries),
+    attrfuncs_shared=len(set(id(entry.timestamp_attrfuncs) for entry in entries)) == 1,
+    weekdays=sorted(set(
+        entry.timestamp_attrfuncs.get('weekday', lambda t: None)(entry.timestamp)
+        for entry in entries
+    ), key=str)
+)))
+'''
+
+weekday_extension = '''
+from simpleblog.extensions import BlogExtension
+
+
+class WeekdayExtension(BlogExtension):
+    
+    def entry_mod_timestamp_attrfuncs(self, entry, attrfuncs):
+        attrfuncs.update(weekday=lambda t: t.weekday())
+        return attrfuncs
+'''
+
+
+class EntryTest(BlogTestCase):
+    
+    synthetic_entries = 20
+    
+    def check_entries(self):
+        return json.loads(self.run_python("-c", entry_checks).splitlines()[-1])
+    
+    def test_shared_data(self):
+        checks = self.check_entries()
+        for name in ('cachekeys', 'categories', 'tags', 'source_kept', 'attrfuncs_shared'):
+            self.assertTrue(checks[name], name)
+        self.assertEqual(checks['weekdays'], [None])
+    
+    def test_modified_timestamp_attrfuncs(self):
+        self.write_file("weekday.py", weekday_extension)
+        config = json.loads(self.read_file("config.json"))
+        self.update_config(
+            extensions=config['extensions'] + ["weekday"],
+            extension_dir=self.blogdir
+        )
+        checks = self.check_entries()
+        # Each entry gets its own mapping for the extension to update
+        self.assertFalse(checks['attrfuncs_shared'])
+        self.assertNotIn(None, checks['weekdays'])
+
+
+if __name__ == '__main__':
+    unittest.main()
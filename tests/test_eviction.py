@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Module TEST_EVICTION -- Tests for evicting cached entry data
+Sub-Package TESTS
+Copyright (C) 2012-2013 by Peter A. Donis
+
+Released under the GNU General Public License, Version 2
+See the LICENSE and README files for more information
+"""
+
+import os
+import json
+import shutil
+import unittest
+
+from tests import BlogTestCase
+
+
+eviction_checks = '''
+import json
+from simpleblog import load_blog
+
+class opts:
+    configfile = "config.json"
+    blogfile = "blog.json"
+
+config, blog = load_blog(opts)
+page = next(page for page in blog.pages if page.source is blog.all_entries[0])
+entry = page.source
+params = page.entry_params(entry, 0)
+formatted = entry.formatted(page.format, params)
+size = entry.cached_size
+entry.evict()
+evicted = sorted(name for name in entry.evict_set if name in entry.__dict__)
+print(json.dumps(dict(
+    size=size,
+    evicted=evicted,
+    evicted_size=entry.cached_size,
+    names=sorted(entry.evict_set),
+    same=entry.formatted(page.format, params) == formatted
+)))
+'''
+
+
+class EvictionTest(BlogTestCase):
+    
+    synthetic_entries = 30
+    
+    def render(self, *args):
+        shutil.rmtree(self.blog_path("static"), ignore_errors=True)
+        self.run_command("render-static", "-q", "-f", *args)
+        return dict(
+            (os.path.relpath(os.path.join(dirpath, name), self.blog_path("static")),
+             self.read_file(os.path.join(dirpath, name)))
+            for dirpath, _, names in os.walk(self.blog_path("static"))
+            for name in names
+        )
+    
+    def test_evict(self):
+        result = json.loads(self.run_python("-c", eviction_checks).splitlines()[-1])
+        self.assertGreater(result['size'], 0)
+        # Names from mixins are evicted along with the entry's own
+        for name in ('source', 'formatted', '_titlestr', '_tagstr', 'converter'):
+            self.assertIn(name, result['names'])
+        self.assertEqual(result['evicted'], [])
+        self.assertEqual(result['evicted_size'], 0)
+        self.assertTrue(result['same'])
+    
+    def test_same_output_with_budget(self):
+        output = self.render()
+        self.assertEqual(self.render("--low-memory"), output)
+        self.update_config(render_memory_budget=5000)
+        self.assertEqual(self.render(), output)
+
+
+if __name__ == '__main__':
+    unittest.main()
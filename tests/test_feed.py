@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Module TEST_FEED -- Tests for the feed extension
+Sub-Package TESTS
+Copyright (C) 2012-2013 by Peter A. Donis
+
+Released under the GNU General Public License, Version 2
+See the LICENSE and README files for more information
+"""
+
+import json
+import unittest
+
+from tests import BlogTestCase
+
+
+# Compares the archive feeds with the periods and entries found by
+# going through all entries
+
+archive_feed_checks = '''
+import json
+from operator import attrgetter
+from simpleblog import load_blog
+from simpleblog.extensions.feed import BlogCurrentFeedEntries, archive_periods
+
+class opts:
+    configfile = "config.json"
+    blogfile = "blog.json"
+
+config, blog = load_blog(opts)
+size = archive_periods.index(config.get("archive_feeds")) + 1
+
+def period(entry):
+    t = entry.timestamp
+    return (t.year, t.month, t.day)[:size]
+
+ordered = sorted(
+    blog.all_entries,
+    key=attrgetter(blog.entry_sort_key),
+    reverse=blog.entry_sort_reversed
+)
+periods = sorted(set(period(entry) for entry in ordered))
+feeds = dict(
+    (source.argindex, source)
+    for source, format in blog.sources + [(blog.index_entries("atom"), "atom")]
+    if isinstance(source, BlogCurrentFeedEntries)
+)
+wrong = []
+for i, source in feeds.items():
+    expected = [entry.cachekey for entry in ordered if period(entry) == source.args]
+    if not (
+        ([entry.cachekey for entry in source.entries] == expected) and
+        (source.prev_args == (periods[i - 1] if i > 0 else None)) and
+        (source.next_args == (periods[i + 1] if i < len(periods) - 2 else None)) and
+        (source.is_current_feed == (i == len(periods) - 1))
+    ):
+        wrong.append(source.args)
+print(json.dumps(dict(
+    periods=len(periods),
+    args=[list(feeds[i].args) for i in sorted(feeds)] == [list(p) for p in periods],
+    wrong=wrong
+)))
+'''
+
+
+class FeedWindowTest(BlogTestCase):
+    
+    synthetic_entries = 40
+    
+    def render_entry(self, seed, name="category0/entry35.html"):
+        self.run_command("render-static", "-q", "-f", environ=dict(PYTHONHASHSEED=seed))
+        return self.read_file("static/{}".format(name))
+    
+    def test_window_size(self):
+        self.update_config(feed_max_entries=5)
+        self.render_entry("0")
+        self.assertEqual(self.read_file("static/index.rss").count("<item>"), 5)
+    
+    def test_window_does_not_change_links(self):
+        # Entry links come from the blog index, not from the feed window,
+        # whatever order the index formats are in
+        expected = self.render_entry("0")
+        self.update_config(feed_max_entries=5)
+        for seed in ("1", "2", "3", "4", "5", "6"):
+            with self.subTest(seed=seed):
+                self.assertEqual(self.render_entry(seed), expected)
+
+
+
+class ArchiveFeedTest(BlogTestCase):
+    
+    # Entries are half a day apart, so these span two months
+    synthetic_entries = 70
+    
+    def test_archive_feeds(self):
+        for archive_feeds in ("year", "month", "day"):
+            with self.subTest(archive_feeds=archive_feeds):
+                self.update_config(archive_feeds=archive_feeds)
+                output = self.run_python("-c", archive_feed_checks)
+                result = json.loads(output.splitlines()[-1])
+                if archive_feeds != "year":
+                    self.assertGreater(result['periods'], 1)
+                self.assertTrue(result['args'])
+                self.assertEqual(result['wrong'], [])
+    
+    def test_archive_feed_links(self):
+        self.run_command("render-static", "-q")
+        current = self.read_file("static/index.atom")
+        self.assertIn('<link rel="current"', self.read_file("static/2010-01.atom"))
+        self.assertIn('rel="prev-archive"', current)
+        self.assertNotIn("<fh:archive />", current)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Module TEST_FOLDING -- Tests for the folding extension
+Sub-Package TESTS
+Copyright (C) 2012-2013 by Peter A. Donis
+
+Released under the GNU General Public License, Version 2
+See the LICENSE and README files for more information
+"""
+
+import unittest
+
+from simpleblog.extensions.render_markdown import BaseFormatter, MarkdownEntryMixin
+from tests import BlogTestCase
+
+
+class FoldingTest(BlogTestCase):
+    
+    entry = "\n".join([
+        "Folded Post",
+        "Short part of the post.",
+        "",
+        "<!-- FOLD -->",
+        "Rest of the *folded* post.",
+        ""
+    ])
+    
+    full_body = "<p>Short part of the post.</p>\n<p>Rest of the <em>folded</em> post.</p>"
+    
+    def render_with(self, extensions):
+        self.write_file("config.yaml", "\n".join(
+            ["entry_ext: .txt", "extensions:"] + ["- {}".format(name) for name in extensions]
+        ))
+        self.write_file("entries/folded-post.txt", self.entry)
+        self.run_command("render-static", "-q", "-f")
+        return self.read_file("static/folded-post.html")
+    
+    def test_full_entry(self):
+        self.assertIn(self.full_body, self.render_with(["title", "render_markdown", "folding"]))
+    
+    def test_full_entry_title_loaded_last(self):
+        # The title loader runs after folding has split the entry, so
+        # the short part is not a prefix of the loaded entry
+        self.assertIn(self.full_body, self.render_with(["render_markdown", "folding", "title"]))
+
+
+class SplitEntry(object):
+    
+    def _do_render_split(self, head, tail):
+        return None
+
+
+class FakeMarkdownEntry(MarkdownEntryMixin, SplitEntry):
+    # Renders each line of the source as a paragraph, with the given
+    # line endings
+    
+    formatter = BaseFormatter()
+    
+    def __init__(self, linesep):
+        self.linesep = linesep
+    
+    def convert(self, rawdata):
+        return self.linesep.join(
+            line if line.startswith("<!--") else "<p>{}</p>".format(line)
+            for line in rawdata.splitlines() if line
+        )
+
+
+class FoldSplitTest(unittest.TestCase):
+    
+    def test_single_pass_split(self):
+        for linesep in ("\n", "\r\n"):
+            with self.subTest(linesep=repr(linesep)):
+                entry = FakeMarkdownEntry(linesep)
+                self.assertEqual(
+                    entry._do_render_split("Short\n\n", "Rest\n"),
+                    ("<p>Short</p>", linesep.join(("<p>Short</p>", "<p>Rest</p>")))
+                )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Module TEST_GRAPH -- Tests for the warm-start graph snapshot
+Sub-Package TESTS
+Copyright (C) 2012-2013 by Peter A. Donis
+
+Released under the GNU General Public License, Version 2
+See the LICENSE and README files for more information
+"""
+
+import os
+import shutil
+import unittest
+
+from tests import BlogTestCase
+
+
+class GraphTest(BlogTestCase):
+    
+    def test_blogfile_without_charset(self):
+        # The charset comes from the default metadata, which is derived
+        # after the snapshot's fingerprint is taken
+        self.write_file("blog.yaml", "\n".join(
+            line for line in self.read_file("blog.yaml").splitlines()
+            if not line.startswith("charset")
+        ))
+        self.run_command("render-static", "-q")
+        self.assertTrue(os.path.isfile(self.blog_path("entries", "graph")))
+        self.run_command("render-static", "-q")
+        self.run_command("check-markdown", "-q")
+        self.assertTrue(os.path.isfile(self.blog_path("static", "index.html")))
+    
+    def test_copied_blog_checks_its_own_files(self):
+        self.run_command("render-static", "-q")
+        original = self.blogdir
+        self.blogdir = os.path.join(self.tempdir, "copy")
+        # Copying keeps the file stamps, so only the location differs
+        shutil.copytree(original, self.blogdir)
+        os.remove(self.blog_path("static", "index.html"))
+        output = self.run_command("render-static", "-u")
+        self.assertNotIn(original, output)
+        self.assertIn("Rendering", output)
+        self.assertTrue(os.path.isfile(self.blog_path("static", "index.html")))
+    
+    def test_unchanged_blog_is_not_rendered(self):
+        self.assertIn("Rendering", self.run_command("render-static"))
+        self.assertNotIn("Rendering", self.run_command("render-static"))
+        self.assertIn("Rendering", self.run_command("render-static", "-f"))
+
+
+if __name__ == '__main__':
+    unittest.main()
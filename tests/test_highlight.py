@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Module TEST_HIGHLIGHT -- Tests for cached code highlighting
+Sub-Package TESTS
+Copyright (C) 2012-2013 by Peter A. Donis
+
+Released under the GNU General Public License, Version 2
+See the LICENSE and README files for more information
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from importlib.util import find_spec
+
+from simpleblog.caching import BlogRenderCache
+
+
+document = """Some code:
+    
+    :::python
+    def f(x):
+        return x * 2
+
+And some more:
+    
+    print("hello")
+"""
+
+
+@unittest.skipUnless(find_spec("pygments"), "Pygments is not installed")
+class CachedHighlightTest(unittest.TestCase):
+    
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp(prefix="simpleblog-test-")
+        self.cache = BlogRenderCache(self.cache_dir, 1024 * 1024)
+    
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+    
+    def convert(self, extension):
+        from markdown import Markdown
+        return Markdown(extensions=[extension]).convert(document)
+    
+    def cached_convert(self):
+        from simpleblog.highlight import CachedCodeHiliteExtension
+        return self.convert(CachedCodeHiliteExtension(self.cache))
+    
+    def cached_files(self):
+        return [
+            os.path.join(dirpath, name)
+            for dirpath, _, names in os.walk(self.cache_dir) for name in names
+        ]
+    
+    def test_same_as_codehilite(self):
+        from markdown.extensions.codehilite import CodeHiliteExtension
+        html = self.convert(CodeHiliteExtension())
+        self.assertIn('class="codehilite"', html)
+        self.assertEqual(self.cached_convert(), html)
+        self.assertEqual(len(self.cached_files()), 2)
+        self.assertEqual(self.cached_convert(), html)
+    
+    def test_blocks_read_from_cache(self):
+        self.cached_convert()
+        for filename in self.cached_files():
+            with open(filename, 'w') as f:
+                f.write("<pre>cached</pre>")
+        self.assertEqual(self.cached_convert().count("<pre>cached</pre>"), 2)
+    
+    def test_other_engines(self):
+        from simpleblog.highlight import block_highlighter
+        highlighter = block_highlighter(False, self.cache)
+        html = highlighter.highlight_html(
+            '<p>Code:</p>\n<pre><code class="language-python">x = 1 &lt; 2\n</code></pre>\n'
+        )
+        self.assertIn('class="codehilite"', html)
+        self.assertNotIn("&amp;lt;", html)
+        self.assertEqual(len(self.cached_files()), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
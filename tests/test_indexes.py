@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Module TEST_INDEXES -- Tests for the shared entry order and indexes
+Sub-Package TESTS
+Copyright (C) 2012-2013 by Peter A. Donis
+
+Released under the GNU General Public License, Version 2
+See the LICENSE and README files for more information
+"""
+
+import json
+import unittest
+
+from tests import BlogTestCase
+
+
+# Compares the entries of each container with the entries found by
+# going through all entries and sorting them, as containers used to
+
+container_checks = '''
+import json
+from collections import Counter
+from operator import attrgetter
+from simpleblog import load_blog
+
+class opts:
+    configfile = "config.json"
+    blogfile = "blog.json"
+
+config, blog = load_blog(opts)
+
+def in_archive(source, entry):
+    t = entry.timestamp
+    return (t.year, t.month if source.month else 0, t.day if source.day else 0) == (
+        source.year, source.month, source.day
+    )
+
+members = dict(
+    blog=lambda source, entry: True,
+    tag=lambda source, entry: source.name in entry.tags,
+    category=lambda source, entry: source.name == entry.category,
+    archive=in_archive
+)
+
+ordered = sorted(
+    blog.all_entries,
+    key=attrgetter(blog.entry_sort_key),
+    reverse=blog.entry_sort_reversed
+)
+checked = Counter()
+wrong = []
+seen = set()
+for source, format in blog.sources:
+    # Paginated containers are split into pages of their entries
+    source = getattr(source, 'orig_source', source)
+    member = members.get(source.sourcetype)
+    if (member is None) or (id(source) in seen):
+        continue
+    seen.add(id(source))
+    expected = [entry for entry in ordered if member(source, entry)]
+    checked[source.sourcetype] += 1
+    if [entry.cachekey for entry in source.entries] != [entry.cachekey for entry in expected]:
+        wrong.append(source.urlshort)
+print(json.dumps(dict(checked=checked, wrong=wrong)))
+'''
+
+
+class IndexTest(BlogTestCase):
+    
+    synthetic_entries = 40
+    synthetic_options = dict(tags=2)
+    
+    def test_container_entries(self):
+        # Check day archives too, not just years and months
+        self.update_config(archive_days=True)
+        result = json.loads(self.run_python("-c", container_checks).splitlines()[-1])
+        for sourcetype in ('blog', 'tag', 'category', 'archive'):
+            self.assertGreater(result['checked'].get(sourcetype, 0), 0, sourcetype)
+        self.assertEqual(result['wrong'], [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Module TEST_JOBS -- Tests for rendering pages in worker processes
+Sub-Package TESTS
+Copyright (C) 2012-2013 by Peter A. Donis
+
+Released under the GNU General Public License, Version 2
+See the LICENSE and README files for more information
+"""
+
+import os
+import glob
+import shutil
+import unittest
+
+from tests import BlogTestCase
+
+
+class JobsTest(BlogTestCase):
+    
+    synthetic_entries = 30
+    
+    cache_names = ("tags", "timestamps", "titles")
+    
+    def render(self, *args):
+        # Start from nothing, so the caches are filled by this render
+        shutil.rmtree(self.blog_path("static"), ignore_errors=True)
+        for name in os.listdir(self.blog_path("entries")):
+            if os.path.isfile(self.blog_path("entries", name)):
+                os.remove(self.blog_path("entries", name))
+        self.run_command("render-static", "-q", *args)
+        return dict(
+            (os.path.relpath(os.path.join(dirpath, name), self.blog_path("static")),
+             self.read_file(os.path.join(dirpath, name)))
+            for dirpath, _, names in os.walk(self.blog_path("static"))
+            for name in names
+        )
+    
+    def caches(self):
+        return dict(
+            (name, self.read_file(os.path.join("entries", name)))
+            for name in self.cache_names
+        )
+    
+    def test_same_output_as_serial(self):
+        serial = self.render()
+        caches = self.caches()
+        self.assertEqual(self.render("-j", "3"), serial)
+        # Workers only journal what they add; the parent compacts the
+        # journals into the cache files when all pages are rendered
+        self.assertEqual(self.caches(), caches)
+        self.assertEqual(glob.glob(self.blog_path("entries", "*.journal*")), [])
+    
+    def test_jobs_with_memory_budget(self):
+        output = self.run_command("render-static", "-q", "-j", "2", "--low-memory", returncode=1)
+        self.assertIn("--jobs can't be used", output)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Module TEST_MARKDOWN -- Tests for the Markdown backends
+Sub-Package TESTS
+Copyright (C) 2012-2013 by Peter A. Donis
+
+Released under the GNU General Public License, Version 2
+See the LICENSE and README files for more information
+"""
+
+import threading
+import unittest
+
+from simpleblog.extensions.render_markdown import (
+    MarkdownBackend, Markdown2Backend, MistuneBackend, MarkdownEntryMixin,
+    shared_converter)
+
+from tests import BlogTestCase
+
+
+# A document the engines are known to agree on, apart from whitespace
+# between block elements (they don't agree on code blocks, for one)
+
+document = """A *short* paragraph with a [link](/foo).
+
+Line one  
+line two
+
+* * *
+
+> quoted
+"""
+
+
+class BackendTest(object):
+    
+    backend = None
+    
+    def convert(self, backend, output_format):
+        return backend(output_format, False, False).convert(document)
+    
+    def normalize(self, html):
+        return "\n".join(line.strip() for line in html.splitlines() if line.strip())
+    
+    def test_output_formats(self):
+        for output_format in ("html4", "html5", "xhtml1"):
+            with self.subTest(output_format=output_format):
+                self.assertEqual(
+                    self.normalize(self.convert(self.backend, output_format)),
+                    self.normalize(self.convert(MarkdownBackend, output_format))
+                )
+    
+    def test_check_markdown(self):
+        self.run_command("check-markdown", "-k", self.backend.module, "-q")
+
+
+@unittest.skipUnless(Markdown2Backend.available(), "markdown2 is not installed")
+class Markdown2Test(BackendTest, BlogTestCase):
+    
+    backend = Markdown2Backend
+
+
+@unittest.skipUnless(MistuneBackend.available(), "mistune is not installed")
+class MistuneTest(BackendTest, BlogTestCase):
+    
+    backend = MistuneBackend
+
+
+
+class PooledEntry(MarkdownEntryMixin):
+    # Just enough of an entry to convert with the shared converter
+    
+    def __init__(self):
+        pass
+    
+    @property
+    def converter(self):
+        return shared_converter("markdown", "html4", False, False)
+
+
+class ConverterPoolTest(unittest.TestCase):
+    
+    def test_shared_converters(self):
+        converter = shared_converter("markdown", "html4", False, False)
+        self.assertIs(shared_converter("markdown", "html4", False, False), converter)
+        self.assertIsNot(shared_converter("markdown", "html5", False, False), converter)
+        converters = []
+        thread = threading.Thread(
+            target=lambda: converters.append(shared_converter("markdown", "html4", False, False))
+        )
+        thread.start()
+        thread.join()
+        self.assertIsNot(converters[0], converter)
+    
+    def test_converter_reset_between_entries(self):
+        # Reference links defined in one entry must not be used in the next
+        first, second = PooledEntry(), PooledEntry()
+        self.assertIs(first.converter, second.converter)
+        self.assertIn('href="/foo"', first.convert("A [link][ref].\n\n[ref]: /foo\n"))
+        self.assertEqual(second.convert("A [link][ref]."), "<p>A [link][ref].</p>")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Module TEST_NAVIGATION -- Tests for shared sibling navigation
+Sub-Package TESTS
+Copyright (C) 2012-2013 by Peter A. Donis
+
+Released under the GNU General Public License, Version 2
+See the LICENSE and README files for more information
+"""
+
+import json
+import unittest
+
+from tests import BlogTestCase
+
+
+# Checks that containers in the same group share one navigation index,
+# and that each container's siblings are the ones it finds by itself
+
+navigation_checks = '''
+import json
+from collections import Counter
+from simpleblog import load_blog
+
+class opts:
+    configfile = "config.json"
+    blogfile = "blog.json"
+
+config, blog = load_blog(opts)
+
+containers = []
+for source, format in blog.sources:
+    source = getattr(source, 'orig_source', source)
+    if (getattr(source, 'sourcetype_group', None) is not None) and (source not in containers):
+        containers.append(source)
+
+groups = Counter()
+wrong = []
+for source in containers:
+    key = source.sourcetype_group
+    groups[source.sourcetype] += 1
+    sources = source._get_sourcetype_sources()
+    i = sources.index(source)
+    prev_source = sources[i - 1] if i > 0 else None
+    next_source = sources[i + 1] if i < len(sources) - 1 else None
+    if not (
+        (source.sourcetype_navigation is blog.source_navigation[key]) and
+        (source.sourcetype_sources == sources) and
+        (source.sourcetype_index == i) and
+        (source.prev_source is prev_source) and
+        (source.next_source is next_source)
+    ):
+        wrong.append(source.urlshort)
+print(json.dumps(dict(
+    groups=groups, wrong=wrong,
+    shared=len(blog.source_navigation) < len(containers)
+)))
+'''
+
+
+class NavigationTest(BlogTestCase):
+    
+    synthetic_entries = 40
+    synthetic_options = dict(tags=2)
+    
+    def test_sibling_navigation(self):
+        self.update_config(archive_days=True)
+        result = json.loads(self.run_python("-c", navigation_checks).splitlines()[-1])
+        for sourcetype in ('tag', 'category', 'archive'):
+            self.assertGreater(result['groups'].get(sourcetype, 0), 1, sourcetype)
+        self.assertTrue(result['shared'])
+        self.assertEqual(result['wrong'], [])
+
+
+if __name__ == '__main__':
+    unittest.main()
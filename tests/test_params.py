@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Module TEST_PARAMS -- Tests for entry format parameters
+Sub-Package TESTS
+Copyright (C) 2012-2013 by Peter A. Donis
+
+Released under the GNU General Public License, Version 2
+See the LICENSE and README files for more information
+"""
+
+import unittest
+
+from simpleblog import BlogEntryParams
+
+
+class EntryParamsTest(unittest.TestCase):
+    
+    def test_equal_params_hash_the_same(self):
+        params = BlogEntryParams(sourcetype='index', force_short=True)
+        same = BlogEntryParams(dict(force_short=True), sourcetype='index')
+        self.assertEqual(params, same)
+        self.assertEqual(hash(params), hash(same))
+        self.assertEqual(len(set([params, same])), 1)
+    
+    def test_different_params_are_not_equal(self):
+        params = BlogEntryParams(sourcetype='index')
+        self.assertNotEqual(params, BlogEntryParams(sourcetype='category'))
+        self.assertNotEqual(params, BlogEntryParams())
+        self.assertNotEqual(params, dict(sourcetype='index'))
+    
+    def test_updated_returns_new_params(self):
+        params = BlogEntryParams(sourcetype='index')
+        updated = params.updated(force_short=True)
+        self.assertIsNone(params.get('force_short'))
+        self.assertEqual(updated, BlogEntryParams(sourcetype='index', force_short=True))
+        self.assertEqual(params.updated(sourcetype='index'), params)
+    
+    def test_params_are_immutable(self):
+        params = BlogEntryParams(sourcetype='index')
+        with self.assertRaises(AttributeError):
+            params.sourcetype = 'category'
+        with self.assertRaises(TypeError):
+            params.update(index=0)
+        self.assertEqual(params.sourcetype, 'index')
+    
+    def test_missing_params(self):
+        params = BlogEntryParams()
+        self.assertFalse(hasattr(params, 'index'))
+        self.assertEqual(params.get('force_short', False), False)
+
+
+if __name__ == '__main__':
+    unittest.main()
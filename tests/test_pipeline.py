@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Module TEST_PIPELINE -- Tests for the streaming render pipeline
+Sub-Package TESTS
+Copyright (C) 2012-2013 by Peter A. Donis
+
+Released under the GNU General Public License, Version 2
+See the LICENSE and README files for more information
+"""
+
+import os
+import unittest
+
+from simpleblog.pipeline import EntryTracker
+from tests import BlogTestCase
+
+
+class Entry(object):
+    
+    def __init__(self, name, cached_size=10):
+        self.name = name
+        self.cached_size = cached_size
+        self.evictions = 0
+    
+    def evict(self):
+        self.evictions += 1
+
+
+class Page(object):
+    
+    def __init__(self, *entries):
+        self.entries = entries
+
+
+class EntryTrackerTest(unittest.TestCase):
+    
+    def setUp(self):
+        self.first, self.second = Entry("first"), Entry("second")
+        self.pages = [
+            Page(self.first, self.second), Page(self.second), Page(), Page(self.first)
+        ]
+    
+    def evictions(self):
+        return (self.first.evictions, self.second.evictions)
+    
+    def test_evicts_after_last_page(self):
+        tracker = EntryTracker(self.pages)
+        expected = [(0, 0), (0, 1), (0, 1), (1, 1)]
+        for page, evictions in zip(self.pages, expected):
+            tracker.page_done(page)
+            self.assertEqual(self.evictions(), evictions)
+        self.assertEqual(tracker.total, 0)
+    
+    def test_zero_budget_keeps_nothing(self):
+        tracker = EntryTracker(self.pages, 0)
+        tracker.page_done(self.pages[0])
+        self.assertEqual(self.evictions(), (1, 1))
+        self.assertEqual(tracker.total, 0)
+    
+    def test_budget_evicts_least_recently_used(self):
+        tracker = EntryTracker(self.pages, 10)
+        tracker.page_done(self.pages[0])
+        # Both entries are still needed, but only one fits the budget
+        self.assertEqual(self.evictions(), (1, 0))
+        self.assertEqual(tracker.total, 10)
+        tracker.page_done(self.pages[1])
+        self.assertEqual(self.evictions(), (1, 1))
+        self.assertEqual(tracker.total, 0)
+
+
+legacy_extension = '''
+from simpleblog.extensions import BlogExtension
+
+
+class LegacyExtension(BlogExtension):
+    
+    def blog_mod_render_items(self, blog, items):
+        return [
+            (data.replace(b"</body>", b"<!-- legacy --></body>"), path)
+            for data, path in items
+        ] + [(b"legacy", "legacy.txt")]
+'''
+
+
+class RenderItemsHookTest(BlogTestCase):
+    
+    def setUp(self):
+        super(RenderItemsHookTest, self).setUp()
+        self.write_file("legacy.py", legacy_extension)
+        self.write_file("config.yaml", self.read_file("config.yaml") + "- legacy\n")
+        self.write_file(
+            "config.yaml",
+            self.read_file("config.yaml") + "extension_dir: {}\n".format(self.blogdir)
+        )
+    
+    def test_hooks_get_page_items(self):
+        self.run_command("render-static", "-q")
+        self.assertIn("<!-- legacy -->", self.read_file(os.path.join("static", "index.html")))
+        self.assertEqual(self.read_file(os.path.join("static", "legacy.txt")), "legacy")
+    
+    def test_hooks_with_jobs_are_an_error(self):
+        output = self.run_command("render-static", "-q", "-j", "2", returncode=1)
+        self.assertIn("hook render_items", output)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Module TEST_RENDER_CACHE -- Tests for the rendered entry cache
+Sub-Package TESTS
+Copyright (C) 2012-2013 by Peter A. Donis
+
+Released under the GNU General Public License, Version 2
+See the LICENSE and README files for more information
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from simpleblog.caching import BlogRenderCache
+from tests import BlogTestCase
+
+
+class RenderCacheTest(unittest.TestCase):
+    
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp(prefix="simpleblog-test-")
+        self.cache = BlogRenderCache(self.cache_dir, 100)
+    
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+    
+    def test_keys(self):
+        key = self.cache.make_key("data", dict(a=1, b=2))
+        self.assertEqual(self.cache.make_key("data", dict(b=2, a=1)), key)
+        self.assertNotEqual(self.cache.make_key("other", dict(a=1, b=2)), key)
+        self.assertNotEqual(self.cache.make_key("data", dict(a=1, b=3)), key)
+    
+    def test_put_and_get(self):
+        key = self.cache.make_key("data", {})
+        self.assertIsNone(self.cache.get(key))
+        self.cache.put(key, "<p>data</p>")
+        self.assertEqual(self.cache.get(key), "<p>data</p>")
+        # Another cache object on the same directory sees the same files
+        self.assertEqual(BlogRenderCache(self.cache_dir, 100).get(key), "<p>data</p>")
+    
+    def test_prune_least_recently_used(self):
+        self.cache.max_size = 150
+        keys = [self.cache.make_key(str(i), {}) for i in range(3)]
+        for i, key in enumerate(keys):
+            self.cache.put(key, "x" * 40)
+            os.utime(self.cache.filename(key), (i, i))
+        # Reading the oldest file makes it the most recently used
+        self.cache.get(keys[0])
+        self.cache.put(self.cache.make_key("3", {}), "x" * 40)
+        self.assertEqual(self.cache.total_size, 120)
+        self.assertIsNotNone(self.cache.get(keys[0]))
+        self.assertIsNone(self.cache.get(keys[1]))
+        self.assertIsNotNone(self.cache.get(keys[2]))
+
+
+class RenderCacheBlogTest(BlogTestCase):
+    
+    def render(self):
+        shutil.rmtree(self.blog_path("static"), ignore_errors=True)
+        self.run_command("render-static", "-q")
+        return self.read_file(os.path.join("static", "example-post.html"))
+    
+    def cached_files(self):
+        return sorted(
+            name for _, _, names in os.walk(self.blog_path("render-cache")) for name in names
+        )
+    
+    def test_cached_renders(self):
+        uncached = self.render()
+        self.write_file("config.yaml", "{}render_cache_dir: {}\n".format(
+            self.read_file("config.yaml"), self.blog_path("render-cache")
+        ))
+        self.assertEqual(self.render(), uncached)
+        files = self.cached_files()
+        self.assertTrue(files)
+        self.assertEqual(self.render(), uncached)
+        self.assertEqual(self.cached_files(), files)
+        name = os.path.join("entries", "example-post.txt")
+        self.write_file(name, self.read_file(name) + "\nAnother paragraph.\n")
+        self.assertIn("<p>Another paragraph.</p>", self.render())
+        self.assertGreater(len(self.cached_files()), len(files))
+
+
+if __name__ == '__main__':
+    unittest.main()
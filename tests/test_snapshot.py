@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Module TEST_SNAPSHOT -- Tests for the entry file snapshot
+Sub-Package TESTS
+Copyright (C) 2012-2013 by Peter A. Donis
+
+Released under the GNU General Public License, Version 2
+See the LICENSE and README files for more information
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from simpleblog import BlogSnapshot
+
+
+class SnapshotTest(unittest.TestCase):
+    
+    files = (
+        "first.txt",
+        "notes.md",
+        os.path.join("category", "second.txt"),
+        os.path.join("category", "nested", "third.txt"),
+        os.path.join(".hidden", "fourth.txt")
+    )
+    
+    def setUp(self):
+        self.path = tempfile.mkdtemp(prefix="simpleblog-test-")
+        for name in self.files:
+            filename = os.path.join(self.path, name)
+            os.makedirs(os.path.dirname(filename), exist_ok=True)
+            with open(filename, 'w') as f:
+                f.write("Title\n")
+        self.snapshot = BlogSnapshot(self.path, ".txt")
+    
+    def tearDown(self):
+        shutil.rmtree(self.path, ignore_errors=True)
+    
+    def test_entry_names(self):
+        self.assertEqual(self.snapshot.entry_names(self.path), ["first"])
+        self.assertEqual(self.snapshot.entry_names(os.path.join(self.path, "category")), ["second"])
+        # Only the directory and its immediate non-hidden subdirectories
+        # are scanned
+        self.assertIsNone(self.snapshot.entry_names(os.path.join(self.path, "category", "nested")))
+        self.assertIsNone(self.snapshot.entry_names(os.path.join(self.path, ".hidden")))
+    
+    def test_stat(self):
+        filename = os.path.join(self.path, "category", "second.txt")
+        self.assertEqual(self.snapshot.stat(filename).st_mtime, os.stat(filename).st_mtime)
+        self.assertEqual(
+            self.snapshot.stat(os.path.join(self.path, "category", "..", "first.txt")),
+            self.snapshot.stat(os.path.join(self.path, "first.txt"))
+        )
+        self.assertIsNone(self.snapshot.stat(os.path.join(self.path, "notes.md")))
+        self.assertIsNone(self.snapshot.stat(os.path.join(self.path, "category", "nested", "third.txt")))
+    
+    def test_missing_directory(self):
+        path = os.path.join(self.path, "missing")
+        self.assertIsNone(BlogSnapshot(path, ".txt").entry_names(path))
+
+
+if __name__ == '__main__':
+    unittest.main()
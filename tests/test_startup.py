@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Module TEST_STARTUP -- Tests for deferred imports and import profiling
+Sub-Package TESTS
+Copyright (C) 2012-2013 by Peter A. Donis
+
+Released under the GNU General Public License, Version 2
+See the LICENSE and README files for more information
+"""
+
+import os
+import json
+import unittest
+
+from tests import BlogTestCase
+
+
+deferred_modules = ('yaml', 'markdown', 'pytz', 'multiprocessing', 'plib.stdlib.tztools')
+
+import_checks = '''
+import sys, json
+import simpleblog
+import simpleblog.commands.render_static
+import simpleblog.extensions.feed
+import simpleblog.extensions.render_markdown
+import simpleblog.extensions.timezone
+print(json.dumps([name for name in {!r} if name in sys.modules]))
+'''.format(deferred_modules)
+
+
+class StartupTest(BlogTestCase):
+    
+    def test_deferred_imports(self):
+        output = self.run_python("-c", import_checks)
+        self.assertEqual(json.loads(output.splitlines()[-1]), [])
+    
+    def test_import_profile(self):
+        output = self.run_command("--import-profile", "render-static")
+        # The command runs as usual, with the report after its output
+        self.assertRegex(
+            output, r"Rendering .*index\.html(.|\n)*Imported \d+ modules in [0-9.]+ ms; slowest:"
+        )
+        self.assertRegex(output, r"\n +[0-9.]+ +[0-9.]+  simpleblog\n")
+        self.assertTrue(os.path.isfile(self.blog_path("static", "index.html")))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Module TEST_TEMPLATES -- Tests for page templates and their values
+Sub-Package TESTS
+Copyright (C) 2012-2013 by Peter A. Donis
+
+Released under the GNU General Public License, Version 2
+See the LICENSE and README files for more information
+"""
+
+import os
+import re
+import unittest
+
+from simpleblog import BlogContext, BlogTemplate
+from tests import BlogTestCase
+
+
+counting_extension = '''
+from simpleblog.extensions import BlogExtension
+
+
+class CountingExtension(BlogExtension):
+    
+    def page_mod_attrs(self, page, attrs):
+        page.blog.metadata['pages_done'] += 1
+        return attrs
+'''
+
+
+class PageContextTest(BlogTestCase):
+    
+    def test_metadata_changed_while_rendering(self):
+        self.write_file("counting.py", counting_extension)
+        self.write_file("config.yaml", "{}- counting\nextension_dir: {}\n".format(
+            self.read_file("config.yaml"), self.blogdir
+        ))
+        self.write_file("blog.yaml", self.read_file("blog.yaml") + "\npages_done: 0\n")
+        self.write_file("templates/page.html", self.read_file("templates/page.html").replace(
+            "</body>", "<p>Done: {blog_pages_done}</p>\n</body>"
+        ))
+        self.run_command("render-static", "-q")
+        counts = sorted(
+            re.search(r"Done: (\d+)", self.read_file(os.path.join("static", name))).group(1)
+            for name in ("index.html", "example-post.html")
+        )
+        # Each page sees the count of the pages formatted before it
+        self.assertEqual(counts, ["0", "1"])
+
+
+class BlogContextTest(unittest.TestCase):
+    
+    def test_layers(self):
+        base = dict(blog_title="Blog", page_title="Base")
+        context = BlogContext(base, page_title="Page")
+        self.assertEqual(context['blog_title'], "Blog")
+        self.assertEqual(context['page_title'], "Page")
+        self.assertEqual(dict(context), dict(blog_title="Blog", page_title="Page"))
+        context['blog_title'] = "Changed"
+        self.assertEqual(base['blog_title'], "Blog")
+        self.assertIs(context.base, base)
+
+
+class TemplateTest(unittest.TestCase):
+    
+    def test_format_context(self):
+        template = BlogTemplate("{blog_title} - {page_title}")
+        context = BlogContext(dict(blog_title="Blog"), page_title="Page")
+        self.assertEqual(template.format_map(context), "Blog - Page")
+    
+    def test_templates_format_like_str(self):
+        values = dict(title="Title", count=3)
+        for text in ("{title}: {count:>4}", "{title!r}", "{title[0]}", "{count:{title[0]}>4}", "{{}}"):
+            with self.subTest(text=text):
+                template = BlogTemplate(text)
+                self.assertEqual(template.format_map(values), text.format(**values))
+                self.assertEqual(template.format(**values), text.format(**values))
+    
+    def test_fields(self):
+        self.assertEqual(BlogTemplate("{a} {b.c} {d[0]} {{e}}").fields, set(["a", "b", "d"]))
+
+
+if __name__ == '__main__':
+    unittest.main()
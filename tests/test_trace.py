@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Module TEST_TRACE -- Tests for build tracing
+Sub-Package TESTS
+Copyright (C) 2012-2013 by Peter A. Donis
+
+Released under the GNU General Public License, Version 2
+See the LICENSE and README files for more information
+"""
+
+import os
+import json
+import shutil
+import tempfile
+import unittest
+
+from simpleblog import trace
+from simpleblog.trace import span, traced, traced_hook, start_tracing, save_trace
+from tests import BlogTestCase
+
+
+@traced("format", lambda page: page['path'])
+def format_page(page):
+    return page['path'].upper()
+
+
+def mod_title(page, title):
+    return title + "!"
+
+
+class TracerTest(unittest.TestCase):
+    
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp(prefix="simpleblog-test-")
+        self.filename = os.path.join(self.tempdir, "trace")
+    
+    def tearDown(self):
+        trace.tracer = None
+        shutil.rmtree(self.tempdir, ignore_errors=True)
+    
+    def run_traced(self, chrome=False):
+        hook = traced_hook("TitleExtension.page_mod_title", mod_title)
+        start_tracing()
+        with span("render"):
+            self.assertEqual(format_page(dict(path="index.html")), "INDEX.HTML")
+            self.assertEqual(hook(None, "Title"), "Title!")
+            self.assertEqual(hook(None, "Other"), "Other!")
+        save_trace(self.filename, chrome)
+        self.assertIsNone(trace.tracer)
+        with open(self.filename, 'r') as f:
+            return json.load(f)
+    
+    def test_spans(self):
+        data = self.run_traced()
+        root = data['spans']
+        self.assertEqual(root['name'], "build")
+        [render] = root['children']
+        self.assertEqual(render['name'], "render")
+        [format] = render['children']
+        self.assertEqual((format['name'], format['detail']), ("format", "index.html"))
+        self.assertLessEqual(format['duration'], render['duration'])
+        self.assertEqual(data['hooks']["TitleExtension.page_mod_title"]['calls'], 2)
+    
+    def test_chrome_events(self):
+        data = self.run_traced(chrome=True)
+        self.assertEqual(
+            [event['name'] for event in data['traceEvents']], ["build", "render", "format"]
+        )
+        self.assertEqual(data['traceEvents'][2]['args'], dict(detail="index.html"))
+        self.assertIn("TitleExtension.page_mod_title", data['otherData']['hooks'])
+    
+    def test_not_tracing(self):
+        hook = traced_hook("TitleExtension.page_mod_title", mod_title)
+        with span("render"):
+            self.assertEqual(format_page(dict(path="index.html")), "INDEX.HTML")
+            self.assertEqual(hook(None, "Title"), "Title!")
+        save_trace(self.filename)
+        self.assertFalse(os.path.exists(self.filename))
+
+
+class BuildTraceTest(BlogTestCase):
+    
+    def test_build_trace(self):
+        filename = os.path.join(self.tempdir, "trace")
+        self.run_command("--trace", filename, "render-static", "-q")
+        with open(filename, 'r') as f:
+            data = json.load(f)
+        phases = [child['name'] for child in data['spans']['children']]
+        for name in ("config", "extensions", "blog", "command"):
+            self.assertIn(name, phases)
+        self.assertEqual(data['hooks']["MarkdownExtension.blog_mod_extra_render_items"]['calls'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()